@@ -1,48 +1,188 @@
 import os
-import requests
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-from firebase_admin import credentials, firestore, initialize_app, auth as admin_auth
+import logging
+from flask import Blueprint, Flask, Response, request, jsonify, send_file
 from dotenv import load_dotenv
 from functools import wraps
 from collections import defaultdict
 import datetime
+import json
+import time
 from werkzeug.utils import secure_filename
-import hashlib
 import uuid
-import stripe
 import random
 import string
+import atexit
+import threading
+from external_clients import get_db, get_stripe
+from firestore_access import FirestoreAccess, FirestoreUnavailable
+from firestore_writes import WriteBehind, commit_submission
+from logging_setup import configure_logging, request_id_var
+import metrics
+from metrics import track_outbound
+from outbound_http import ProviderUnavailable, get_client
+import tracing
+from tracing import start_span
+from catalog_cache import CatalogCache
+from service_catalog import get_catalog
+from user_store import InMemoryUserStore, FirestoreUserStore, InvalidEmail
+from password_hasher import PasswordHasher, HasherBusy
+from file_storage import create_storage
+from chunked_uploads import ChunkedUploadManager, UploadError
+from document_extraction import FlanT5Extractor, ExtractionJobs
+from pdf_text import PdfTextCache
+from job_queue import SQLiteJobQueue, WorkerPool
+from document_verification import DocumentVerifier
+from requirement_index import RequirementIndex, IndexedClassifier, FlanT5Judge
+from application_store import ApplicationStore, IdAllocator, encode_cursor, decode_cursor, project
 
 # ─── Load environment variables ─────────────────────────────────────────────
 load_dotenv()
 
+logger = logging.getLogger("app")
+
 # ─── Flask setup ───────────────────────────────────────────────────────────
-app = Flask(__name__)
-CORS(app, origins="*")
-
-# ─── Stripe setup ──────────────────────────────────────────────────────────
-stripe.api_key = os.getenv("STRIPE_SECRET_KEY", "sk_test_51234567890")  # Use test key by default
-
-# Try to initialize Firebase, but continue without it if it fails
-try:
-    GOOGLE_CREDENTIALS = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-    if GOOGLE_CREDENTIALS and os.path.isfile(GOOGLE_CREDENTIALS):
-        cred = credentials.Certificate(GOOGLE_CREDENTIALS)
-        initialize_app(cred)
-        db = firestore.client()
-        print("Firebase initialized successfully")
-    else:
-        db = None
-        print("Firebase credentials not found, using mock data")
-except Exception as e:
-    print(f"Firebase initialization failed: {e}")
-    db = None
+# Routes live on a blueprint; create_app() builds the Flask app around it.
+# Firebase and Stripe are initialized on first use (see external_clients.py).
+api = Blueprint("api", __name__)
+
+# ─── Firestore access ──────────────────────────────────────────────────────
+# Deadlines and a circuit breaker per collection for every Firestore call
+firestore_access = FirestoreAccess.from_env(get_db)
+
+def firestore_unavailable_response(e):
+    response = jsonify({"error": "Service temporarily unavailable, please retry shortly"})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 503
+
+api.register_error_handler(FirestoreUnavailable, firestore_unavailable_response)
+
+# ─── Services catalog cache ────────────────────────────────────────────────
+# The last catalog read from Firestore is kept on disk and served during outages
+catalog_cache = CatalogCache(
+    firestore_access,
+    lkg_path=os.getenv("CATALOG_LKG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog_lkg.json")),
+    cold_wait=float(os.getenv("CATALOG_COLD_WAIT", "1.0")),
+)
+
+# ─── Password hashing pool ─────────────────────────────────────────────────
+# Each hash in flight holds a request thread while it waits, so by default at
+# most half of the worker's threads may be hashing; the rest keep serving
+request_threads = int(os.getenv("GUNICORN_THREADS", "8"))
+password_hasher = PasswordHasher(
+    max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", "2")),
+    max_in_flight=int(os.getenv("PASSWORD_HASH_MAX_IN_FLIGHT", str(max(1, request_threads // 2)))),
+)
+if password_hasher.max_in_flight >= request_threads:
+    logger.warning("PASSWORD_HASH_MAX_IN_FLIGHT=%d leaves none of the %d request threads free during a login burst",
+                   password_hasher.max_in_flight, request_threads)
+
+def hasher_busy_response(e):
+    response = jsonify({"error": "Server busy, please retry shortly"})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 503
 
 # Limits
 ALLOWED_EXTENSIONS = {"pdf", "png", "jpg", "jpeg"}
 MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5 MB
-app.config["MAX_CONTENT_LENGTH"] = MAX_CONTENT_LENGTH
+# Uploaded documents, stored by SHA-256 of their content
+file_storage = create_storage()
+# Each chunk is one raw PUT body, so it must fit under Flask's request size limit
+upload_chunk_size = int(os.getenv("UPLOAD_CHUNK_SIZE", str(4 * 1024 * 1024)))
+if not 0 < upload_chunk_size <= MAX_CONTENT_LENGTH:
+    raise RuntimeError(
+        f"UPLOAD_CHUNK_SIZE={upload_chunk_size} must be between 1 and MAX_CONTENT_LENGTH ({MAX_CONTENT_LENGTH} bytes); "
+        "larger chunk PUTs would be rejected with 413"
+    )
+upload_manager = ChunkedUploadManager(
+    file_storage,
+    os.getenv("UPLOAD_STAGING_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "upload_staging")),
+    chunk_size=upload_chunk_size,
+    max_size=int(os.getenv("MAX_UPLOAD_SIZE", str(200 * 1024 * 1024))),
+)
+
+# Extracted PDF text, cached by content hash and PyMuPDF version
+pdf_text_cache = PdfTextCache(
+    os.getenv("PDF_TEXT_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "text_cache"))
+)
+
+# Document extraction runs on a background worker; the model loads once per process
+extraction_jobs = ExtractionJobs(
+    FlanT5Extractor(
+        model_name=os.getenv("EXTRACTION_MODEL", "google/flan-t5-small"),
+        batch_size=int(os.getenv("EXTRACTION_BATCH_SIZE", "16")),
+        backend=os.getenv("EXTRACTION_BACKEND", "torch"),
+    ),
+    lambda digest: pdf_text_cache.extract_text(file_storage.path_for(digest), digest),
+    result_ttl=int(os.getenv("EXTRACTION_RESULT_TTL", "3600")),
+    max_finished=int(os.getenv("EXTRACTION_MAX_FINISHED", "1000")),
+)
+
+# ─── Document verification jobs ────────────────────────────────────────────
+verification_queue = SQLiteJobQueue(
+    os.getenv("JOB_QUEUE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs.sqlite3")),
+    retry_delay=float(os.getenv("JOB_RETRY_DELAY", "5")),
+)
+
+# Each open verification stream holds a gthread worker thread, so only a few
+# may be open per process; the rest are asked to poll instead
+VERIFICATION_STREAM_SECONDS = int(os.getenv("VERIFICATION_STREAM_SECONDS", "60"))
+verification_stream_slots = threading.BoundedSemaphore(int(os.getenv("VERIFICATION_STREAM_LIMIT", "2")))
+
+def load_document_text(entry):
+    """Text of an uploaded file for verification; empty for images or unreadable files"""
+    digest = entry.get("sha256")
+    if not digest or not entry.get("filename", "").lower().endswith(".pdf"):
+        return ""
+    try:
+        return pdf_text_cache.extract_text(file_storage.path_for(digest), digest)
+    except Exception as e:
+        logger.warning("Could not read %s for verification: %s", entry.get('filename'), e)
+        return ""
+
+def current_catalog():
+    db = get_db()
+    if db:
+        categories, _ = catalog_cache.get_categories(db)
+        if categories:
+            return categories
+    return get_mock_license_data()
+
+requirement_index_state = {"key": None, "index": None}
+
+def current_requirement_index():
+    """Requirement index for the current catalog, rebuilt when the catalog version changes"""
+    key = catalog_cache.version if get_db() else "mock"
+    if requirement_index_state["key"] != key or requirement_index_state["index"] is None:
+        requirement_index_state["index"] = RequirementIndex.from_catalog(current_catalog())
+        requirement_index_state["key"] = key
+    return requirement_index_state["index"]
+
+# Non-critical updates (verification progress, optionally client profiles) are
+# merged and committed in the background instead of on the request path
+write_behind = WriteBehind(firestore_access, flush_interval=float(os.getenv("WRITE_BEHIND_INTERVAL", "1.0")))
+atexit.register(write_behind.flush)
+CLIENT_PROFILE_WRITE_BEHIND = os.getenv("CLIENT_PROFILE_WRITE_BEHIND") == "1"
+
+def save_verification(app_id, verification):
+    application_store.update(app_id, {"document_verification": verification})
+    if get_db():
+        write_behind.update('applications', app_id, {"document_verification": verification})
+
+verification_workers = WorkerPool(
+    verification_queue,
+    {"verify_application": DocumentVerifier(
+        lambda app_id: application_store.get(app_id), current_catalog, load_document_text, save_verification,
+        classifier=IndexedClassifier(
+            current_requirement_index,
+            # Only documents the index can't place are sent to flan-t5
+            judge=FlanT5Judge(extraction_jobs.extractor) if os.getenv("VERIFICATION_MODEL_FALLBACK", "1") == "1" else None,
+        ),
+    )},
+    workers=int(os.getenv("VERIFICATION_WORKERS", "2")),
+)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -56,8 +196,9 @@ def generate_app_id():
     return f"A{random_part}"  # A prefix + 6 random chars = 7 total
 
 # Mock data storage for demo
-applications = []
-users = [
+application_store = ApplicationStore()
+application_ids = IdAllocator(generate_app_id)
+seed_users = [
     # Sample client profile for demo
     {
         "name": "John Doe",
@@ -72,6 +213,12 @@ users = [
     }
 ]  # Mock user storage
 
+# Users indexed by normalized email; USER_STORE=firestore keeps them in Firestore instead
+if os.getenv("USER_STORE") == "firestore":
+    user_store = FirestoreUserStore(firestore_access)
+else:
+    user_store = InMemoryUserStore(seed_users)
+
 # Companies storage
 companies = [
     {
@@ -99,100 +246,24 @@ companies = [
         "status": "active"
     }
 ]
+company_ids = IdAllocator(generate_app_id, (comp["id"] for comp in companies))
 
 def get_mock_license_data():
-    """Return mock license data for testing when Firestore is unavailable"""
-    return [
-        {
-            "name": "IT Service Licenses",
-            "licenses": [
-                {
-                    "id": "asp_001",
-                    "name": "Application Service Provider",
-                    "description": "Provide software applications and services to customers over the internet, including SaaS, web applications, and cloud-based solutions.",
-                    "application_requirements": [
-                        "Valid business registration certificate",
-                        "Technical infrastructure documentation",
-                        "Data protection and privacy compliance certificate",
-                        "Service level agreement (SLA) templates",
-                        "Business continuity and disaster recovery plan",
-                        "Professional liability insurance certificate",
-                        "Technical team qualifications and certifications"
-                    ],
-                    "renewal_requirements": [
-                        "Updated infrastructure documentation",
-                        "Renewed data protection compliance certificate",
-                        "Updated SLA templates",
-                        "Current disaster recovery plan"
-                    ],
-                    "first_time_application_fee": 50,
-                    "renewal_application_fee": 30,
-                    "first_time_license_fee": 250,
-                    "renewal_license_fee": 200,
-                    "validity": 2,
-                    "processing_time": 21
-                },
-                {
-                    "id": "ni_001", 
-                    "name": "Network Infrastructure",
-                    "description": "Deploy, maintain, and operate network infrastructure including fiber optic cables, wireless towers, data centers, and telecommunications equipment.",
-                    "application_requirements": [
-                        "Environmental impact assessment report",
-                        "Technical specifications and equipment documentation",
-                        "Safety and health compliance certificates",
-                        "Site acquisition agreements and permits",
-                        "Engineering plans and network topology diagrams",
-                        "Equipment supplier certifications",
-                        "Installation and maintenance team qualifications"
-                    ],
-                    "renewal_requirements": [
-                        "Updated environmental impact assessment",
-                        "Current safety compliance certificates",
-                        "Updated equipment documentation",
-                        "Maintenance records and reports"
-                    ],
-                    "first_time_application_fee": 75,
-                    "renewal_application_fee": 50,
-                    "first_time_license_fee": 400,
-                    "renewal_license_fee": 300,
-                    "validity": 3,
-                    "processing_time": 30
-                },
-                {
-                    "id": "nsp_001",
-                    "name": "Network Service Provider",
-                    "description": "Provide internet connectivity, telecommunications services, and network access to end users including ISP services, mobile networks, and enterprise connectivity.",
-                    "application_requirements": [
-                        "Spectrum allocation request and documentation",
-                        "Network coverage plans and service area maps",
-                        "Quality of service (QoS) guarantees and metrics",
-                        "Interconnection agreements with other providers",
-                        "Customer service and support procedures",
-                        "Billing and payment processing systems documentation",
-                        "Network security and monitoring capabilities"
-                    ],
-                    "renewal_requirements": [
-                        "Updated spectrum allocation documentation",
-                        "Current network coverage and expansion plans",
-                        "QoS performance reports",
-                        "Updated interconnection agreements"
-                    ],
-                    "first_time_application_fee": 100,
-                    "renewal_application_fee": 75,
-                    "first_time_license_fee": 500,
-                    "renewal_license_fee": 400,
-                    "validity": 5,
-                    "processing_time": 45
-                }
-            ]
-        }
-    ]
+    """Bundled catalog (catalog/services.json), served when Firestore is unavailable or empty"""
+    return get_catalog().categories
+
+def bundled_catalog_response():
+    catalog = get_catalog()
+    return catalog.payload.to_response(request, headers={
+        'X-Catalog-Version': f"bundled-{catalog.version}",
+        'X-Catalog-Source': 'bundled',
+    })
 
-@app.route('/')
+@api.route('/')
 def home():
     return jsonify({"message": "LicenseEase backend running."})
 
-@app.route('/register', methods=['POST'])
+@api.route('/register', methods=['POST'])
 def register():
     try:
         data = request.get_json()
@@ -210,12 +281,12 @@ def register():
             return jsonify({"error": "Missing required fields"}), 400
         
         # Check if user already exists
-        if any(user['email'] == email for user in users):
+        if user_store.exists(email):
             return jsonify({"error": "User already exists"}), 409
         
         # Create user
         user_id = str(uuid.uuid4())
-        hashed_password = hashlib.sha256(password.encode()).hexdigest()
+        hashed_password = password_hasher.hash(password)
         
         new_user = {
             "id": user_id,
@@ -229,7 +300,8 @@ def register():
             "createdAt": datetime.datetime.now().isoformat()
         }
         
-        users.append(new_user)
+        if not user_store.add(new_user):
+            return jsonify({"error": "User already exists"}), 409
         
         # Return user data without password
         user_response = {k: v for k, v in new_user.items() if k != 'password'}
@@ -240,10 +312,16 @@ def register():
             "token": f"mock_token_{user_id}"
         }), 201
         
+    except InvalidEmail:
+        return jsonify({"error": "Invalid email address"}), 400
+    except HasherBusy as e:
+        return hasher_busy_response(e)
+    except FirestoreUnavailable as e:
+        return firestore_unavailable_response(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/login', methods=['POST'])
+@api.route('/login', methods=['POST'])
 def login():
     try:
         data = request.get_json()
@@ -254,15 +332,22 @@ def login():
             return jsonify({"error": "Email and password are required"}), 400
         
         # Find user
-        user = next((u for u in users if u['email'] == email), None)
+        user = user_store.get_by_email(email)
         if not user:
             return jsonify({"error": "Invalid credentials"}), 401
         
         # Verify password
-        hashed_password = hashlib.sha256(password.encode()).hexdigest()
-        if user['password'] != hashed_password:
+        valid, needs_rehash = password_hasher.verify(password, user.get('password'))
+        if not valid:
             return jsonify({"error": "Invalid credentials"}), 401
         
+        # Upgrade hashes made with older cost parameters; skip if the pool is busy
+        if needs_rehash:
+            try:
+                user = user_store.update(email, {"password": password_hasher.hash(password)}) or user
+            except (HasherBusy, FirestoreUnavailable):
+                pass
+        
         # Return user data without password
         user_response = {k: v for k, v in user.items() if k != 'password'}
         
@@ -272,19 +357,20 @@ def login():
             "token": f"mock_token_{user['id']}"
         }), 200
         
+    except HasherBusy as e:
+        return hasher_busy_response(e)
+    except FirestoreUnavailable as e:
+        return firestore_unavailable_response(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/signin', methods=['POST'])
+@api.route('/signin', methods=['POST'])
 def signin():
     """Handle Firebase token-based signin"""
     try:
-        print("=== SIGNIN REQUEST ===")
         data = request.get_json()
         token = data.get('token')
         
-        print(f"Received token for signin: {token[:50] if token else 'None'}...")
-        
         if not token:
             return jsonify({"error": "Token is required"}), 400
         
@@ -300,7 +386,7 @@ def signin():
             "role": "client"
         }
         
-        print(f"Signin successful for user: {user_data['email']}")
+        logger.info("Signin successful", extra={"user_id": user_data["id"]})
         
         return jsonify({
             "message": "Login successful",
@@ -308,26 +394,23 @@ def signin():
         }), 200
         
     except Exception as e:
-        print(f"Signin error: {str(e)}")
+        logger.exception("Signin error")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/signup', methods=['POST'])
+@api.route('/signup', methods=['POST'])
 def signup():
     """Handle Firebase user role assignment"""
     try:
-        print("=== SIGNUP REQUEST ===")
         data = request.get_json()
         uid = data.get('uid')
         role = data.get('role', 'client')
         
-        print(f"User signup: UID={uid}, Role={role}")
-        
         if not uid:
             return jsonify({"error": "UID is required"}), 400
         
         # In a real app, you would store the user role in Firestore
         # For demo purposes, just return success
-        print(f"Signup successful for UID: {uid}")
+        logger.info("Signup successful", extra={"uid": uid, "role": role})
         
         return jsonify({
             "message": "User role assigned successfully",
@@ -336,10 +419,10 @@ def signup():
         }), 200
         
     except Exception as e:
-        print(f"Signup error: {str(e)}")
+        logger.exception("Signup error")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/change-password', methods=['POST'])
+@api.route('/change-password', methods=['POST'])
 def change_password():
     """Handle password change requests"""
     try:
@@ -360,7 +443,7 @@ def change_password():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/profile', methods=['GET'])
+@api.route('/profile', methods=['GET'])
 def get_profile():
     # Mock endpoint for getting user profile
     # In a real app, you'd verify the token
@@ -374,158 +457,151 @@ def get_profile():
         "role": "client"
     }), 200
 
-@app.route('/get_services', methods=['GET', 'POST'])
-@app.route('/services', methods=['GET'])
+@api.route('/get_services', methods=['GET', 'POST'])
+@api.route('/services', methods=['GET'])
 def get_services():
     try:
+        db = get_db()
         if db:
-            print("Fetching services from Firestore")
-            docs = db.collection('services').stream()
-
-            # 1) Read all docs and flatten requirements
-            raw_items = []
-            for doc in docs:
-                item = doc.to_dict()
-                item['id'] = doc.id
-
-                # Flatten nested { "documents": [...] } into a plain list
-                app_reqs = item.get('application_requirements', {})
-                if isinstance(app_reqs, dict) and 'documents' in app_reqs:
-                    item['application_requirements'] = app_reqs['documents']
-                else:
-                    item['application_requirements'] = app_reqs if isinstance(app_reqs, list) else []
+            payload, version = catalog_cache.get_payload(db)
 
-                renew_reqs = item.get('renewal_requirements', {})
-                if isinstance(renew_reqs, dict) and 'documents' in renew_reqs:
-                    item['renewal_requirements'] = renew_reqs['documents']
-                else:
-                    item['renewal_requirements'] = renew_reqs if isinstance(renew_reqs, list) else []
-
-                raw_items.append(item)
-
-            # 2) Group by category field
-            categories_dict = defaultdict(list)
-            for svc in raw_items:
-                cat_name = svc.get('category', 'Uncategorized')
-                license_obj = {
-                    "id": svc["id"],
-                    "name": svc.get("name", ""),
-                    "application_requirements": svc.get("application_requirements", []),
-                    "renewal_requirements": svc.get("renewal_requirements", []),
-                    "first_time_application_fee": svc.get("first_time_application_fee", 0),
-                    "renewal_application_fee": svc.get("renewal_application_fee", 0),
-                    "first_time_license_fee": svc.get("first_time_license_fee", 0),
-                    "renewal_license_fee": svc.get("renewal_license_fee", 0),
-                    "validity": svc.get("validity", 0),
-                    "processing_time": svc.get("processing_time", 0),
-                }
-                categories_dict[cat_name].append(license_obj)
-
-            # 3) Transform dict into a list
-            categories = []
-            for name, licenses in categories_dict.items():
-                categories.append({
-                    "name": name,
-                    "licenses": licenses
+            if payload:
+                logger.debug("Returning catalog version %s (etag %s)", version, payload.etag)
+                return payload.to_response(request, headers={
+                    'X-Catalog-Version': version,
+                    'X-Catalog-Source': 'last-known-good' if catalog_cache.stale else 'firestore',
                 })
-
-            if categories:
-                print(f"Returning {len(categories)} categories from Firestore")
-                return jsonify(categories), 200
             else:
-                print("No Firestore data found, using mock data")
-                return jsonify(get_mock_license_data()), 200
+                logger.warning("Catalog not loaded yet or empty, using the bundled catalog")
+                return bundled_catalog_response()
         else:
-            print("Using mock data (no Firestore connection)")
-            return jsonify(get_mock_license_data()), 200
+            logger.debug("Using the bundled catalog (no Firestore connection)")
+            return bundled_catalog_response()
             
     except Exception as e:
-        print(f"Error in get_services: {e}")
-        print("Falling back to mock data")
-        return jsonify(get_mock_license_data()), 200
+        logger.exception("Error in get_services, falling back to the bundled catalog")
+        return bundled_catalog_response()
+
+@api.route('/services/version', methods=['GET'])
+def get_services_version():
+    """Version of the catalog /services would return right now (its ETag, or bundled-<hash>)"""
+    try:
+        db = get_db()
+        if db:
+            categories, version = catalog_cache.get_categories(db)
+            if categories:
+                return jsonify({"version": version, "source": "last-known-good" if catalog_cache.stale else "firestore"}), 200
+    except Exception:
+        logger.exception("Error reading the catalog version, reporting the bundled catalog")
+    return jsonify({"version": f"bundled-{get_catalog().version}", "source": "bundled"}), 200
 
-@app.route("/applications", methods=["GET"])
+@api.route("/applications", methods=["GET"])
 def get_applications():
+    """
+    List applications ordered by submitted_at.
+
+    Query params: status, license_type, applicant_email filters; fields=a,b
+    projection (files_count may be requested instead of files); order=asc|desc. Passing limit or cursor switches to a paged
+    response {"applications": [...], "next_cursor": ...}; without them the
+    full filtered list is returned as before.
+    """
     # In a real app, you would filter by user ID from token
-    # For demo, return all applications
-    return jsonify(applications)
+    try:
+        args = request.args
+        fields = [f for f in args.get("fields", "").split(",") if f]
+        paged = "limit" in args or "cursor" in args
+        limit = None
+        if paged:
+            limit = min(max(int(args.get("limit", DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        cursor = decode_cursor(args["cursor"]) if args.get("cursor") else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    results, next_key = application_store.query(
+        status=args.get("status"),
+        license_type=args.get("license_type"),
+        applicant_email=args.get("applicant_email"),
+        cursor=cursor,
+        limit=limit,
+        descending=args.get("order") == "desc",
+    )
+    results = [project(app, fields) for app in results]
+
+    if not paged:
+        return jsonify(results)
+    return jsonify({
+        "applications": results,
+        "next_cursor": encode_cursor(next_key) if next_key else None
+    })
 
-@app.route("/applications/<int:app_id>", methods=["GET"])
+@api.route("/applications/<app_id>", methods=["GET"])
 def get_application(app_id):
     """Get a specific application by ID"""
     try:
-        app = next((a for a in applications if a["id"] == app_id), None)
+        app = application_store.get(app_id)
         if not app:
             return jsonify({"error": "Application not found"}), 404
         return jsonify(app), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route("/clients", methods=["GET"])
+@api.route("/clients", methods=["GET"])
 def get_clients():
     """Get all client profiles for admin dashboard"""
     try:
-        # Filter users to only include clients
-        clients = [user for user in users if user.get("role") == "client"]
-        
-        # Add additional statistics for each client
-        for client in clients:
-            client_email = client.get("email")
-            client_applications = [app for app in applications if app.get("applicant_email") == client_email]
-            
-            client["applications_count"] = len(client_applications)
-            client["pending_applications"] = len([app for app in client_applications if app.get("status") == "pending"])
-            client["approved_applications"] = len([app for app in client_applications if app.get("status") == "approved"])
-            client["rejected_applications"] = len([app for app in client_applications if app.get("status") == "rejected"])
-            
-            # Get latest application date
-            if client_applications:
-                latest_app = max(client_applications, key=lambda x: x.get("submitted_at", ""))
-                client["last_application_date"] = latest_app.get("submitted_at")
-                client["last_application_type"] = latest_app.get("license_type")
-            else:
-                client["last_application_date"] = None
-                client["last_application_type"] = None
+        # Filter users to only include clients and attach their precomputed counters, without password hashes
+        clients = [
+            {**{k: v for k, v in user.items() if k != 'password'}, **application_store.client_summary(user.get("email"))}
+            for user in user_store.all()
+            if user.get("role") == "client"
+        ]
         
         return jsonify(clients), 200
+    except FirestoreUnavailable as e:
+        return firestore_unavailable_response(e)
     except Exception as e:
-        print(f"Error fetching clients: {e}")
+        logger.exception("Error fetching clients")
         return jsonify({"error": "Internal server error"}), 500
 
-@app.route("/clients/<client_email>", methods=["GET"])
+@api.route("/clients/<client_email>", methods=["GET"])
 def get_client_profile(client_email):
     """Get a specific client profile by email"""
     try:
-        client = next((u for u in users if u.get("email") == client_email and u.get("role") == "client"), None)
-        if not client:
+        client = user_store.get_by_email(client_email)
+        if not client or client.get("role") != "client":
             return jsonify({"error": "Client not found"}), 404
         
         # Add client's applications
-        client_applications = [app for app in applications if app.get("applicant_email") == client_email]
-        client["applications"] = client_applications
+        client_applications = application_store.by_email(client_email)
+        client_response = {k: v for k, v in client.items() if k != 'password'}
         
-        return jsonify(client), 200
+        return jsonify({**client_response, "applications": client_applications}), 200
+    except FirestoreUnavailable as e:
+        return firestore_unavailable_response(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route("/health", methods=["GET"])
+@api.route("/health", methods=["GET"])
 def health_check():
     """Simple health check endpoint"""
     return jsonify({"status": "ok", "message": "Server is running"}), 200
 
-@app.route("/test-submit", methods=["POST"])
+@api.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Request and outbound-call metrics for this process in Prometheus text format"""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@api.route("/test-submit", methods=["POST"])
 def test_submit():
     """Test endpoint to debug submission issues"""
     try:
-        print("=== TEST SUBMIT REQUEST ===")
-        print(f"Content-Type: {request.content_type}")
-        print(f"Headers: {dict(request.headers)}")
-        print(f"Form keys: {list(request.form.keys())}")
-        print(f"Files keys: {list(request.files.keys())}")
-        
-        # Log form data
-        for key in request.form.keys():
-            print(f"Form field {key}: {request.form.get(key)}")
+        # Field names only: headers and values may carry tokens or personal data
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Test submit", extra={
+                "content_type": request.content_type,
+                "form_keys": list(request.form.keys()),
+                "files_keys": list(request.files.keys()),
+            })
         
         return jsonify({
             "message": "Test endpoint working",
@@ -535,25 +611,19 @@ def test_submit():
         }), 200
         
     except Exception as e:
-        print(f"ERROR in test_submit: {str(e)}")
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Error in test_submit")
         return jsonify({"error": f"Test error: {str(e)}"}), 500
 
-@app.route("/applications-minimal", methods=["POST"])
+@api.route("/applications-minimal", methods=["POST"])
 def submit_application_minimal():
     """Minimal version to test basic functionality"""
     try:
-        print("=== MINIMAL SUBMIT APPLICATION ===")
-        
         # Get basic form data
         license_type = request.form.get("license_type")
         description = request.form.get("description")
         applicant_name = request.form.get("applicant_name")
         applicant_email = request.form.get("applicant_email")
         
-        print(f"Received: {license_type}, {description}, {applicant_name}, {applicant_email}")
-        
         # Basic validation
         if not license_type or not description or not applicant_name or not applicant_email:
             return jsonify({"error": "Missing required fields"}), 400
@@ -563,7 +633,7 @@ def submit_application_minimal():
             return jsonify({"error": "At least one file required"}), 400
         
         # Create simple response
-        app_id = len(applications) + 1
+        app_id = len(application_store) + 1
         return jsonify({
             "message": "Application submitted successfully",
             "application_id": app_id,
@@ -571,18 +641,17 @@ def submit_application_minimal():
         }), 201
         
     except Exception as e:
-        print(f"MINIMAL ENDPOINT ERROR: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Minimal endpoint error")
         return jsonify({"error": f"Minimal endpoint error: {str(e)}"}), 500
 
-@app.route("/applications", methods=["POST"])
+@api.route("/applications", methods=["POST"])
 def submit_application():
-    print("=== SUBMIT APPLICATION ===")
-    print(f"Content-Type: {request.content_type}")
-    print(f"Method: {request.method}")
-    
     try:
+        # Parse the multipart body up front so its cost shows up as its own span
+        with start_span("multipart.parse") as span:
+            span.set_attribute("http.request.body.size", request.content_length or 0)
+            request.files
+        
         # Get basic form data
         license_type = request.form.get("license_type")
         description = request.form.get("description")
@@ -591,42 +660,63 @@ def submit_application():
         applicant_phone = request.form.get("applicant_phone")
         company = request.form.get("company")
         
-        print(f"License Type: {license_type}")
-        print(f"Description: {description}")
-        print(f"Applicant: {applicant_name} ({applicant_email})")
-        
         # Basic validation
         if not license_type or not description or not applicant_name or not applicant_email:
             return jsonify({"error": "Missing required fields"}), 400
         
-        # Check files
-        files_count = len(request.files)
-        print(f"Files uploaded: {files_count}")
+        # Files arrive inline and/or as finalized resumable uploads:
+        # uploads=[{"type": "<requirement>", "upload_id": "<id>"}, ...]
+        try:
+            upload_refs = json.loads(request.form.get("uploads") or "[]")
+            finalized_uploads = [
+                (ref.get("type", "document"), upload_manager.get_completed(ref["upload_id"]))
+                for ref in upload_refs
+            ]
+        except UploadError as e:
+            return jsonify({"error": str(e)}), e.status
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return jsonify({"error": "uploads must be a JSON list of {type, upload_id}"}), 400
+        
+        files_count = len(request.files) + len(finalized_uploads)
+        logger.debug("Submission for %s with %d files", license_type, files_count)
         
         if files_count == 0:
             return jsonify({"error": "At least one file required"}), 400
         
         # Generate unique random application ID
-        app_id = generate_app_id()
-        
-        # Ensure ID is unique
-        while any(app.get("id") == app_id for app in applications):
-            app_id = generate_app_id()
+        app_id = application_ids.allocate()
         
-        # Process files info for storage
+        # Stream each upload into content-addressed storage
         files_info = []
         for key in request.files:
             files = request.files.getlist(key)
             for file in files:
                 if file and file.filename != "":
+                    stored = file_storage.put_stream(file.stream)
+                    filename = secure_filename(file.filename) or "document"
                     files_info.append({
                         "type": key,
-                        "filename": file.filename,
+                        "filename": filename,
                         "original_filename": file.filename,
-                        "url": f"http://127.0.0.1:5002/files/{file.filename}",
-                        "size": 0,
+                        "content_type": file.mimetype,
+                        "sha256": stored.sha256,
+                        "url": f"{request.host_url}files/{stored.sha256}/{filename}",
+                        "size": stored.size,
                         "uploaded_at": datetime.datetime.now().isoformat()
                     })
+        for key, upload in finalized_uploads:
+            filename = secure_filename(upload["filename"]) or "document"
+            files_info.append({
+                "type": key,
+                "filename": filename,
+                "original_filename": upload["filename"],
+                "content_type": upload.get("content_type"),
+                "sha256": upload["sha256"],
+                "upload_id": upload["upload_id"],
+                "url": f"{request.host_url}files/{upload['sha256']}/{filename}",
+                "size": upload["size"],
+                "uploaded_at": upload["completed_at"]
+            })
         
         # Create application data
         app_data = {
@@ -642,6 +732,7 @@ def submit_application():
             "submitted_at": datetime.datetime.now().isoformat(),
             "updated_at": datetime.datetime.now().isoformat(),
             "processing_notes": [],
+            "document_verification": {"status": "queued"},
             "fees": {
                 "application_fee": 50,
                 "license_fee": 250,
@@ -651,15 +742,20 @@ def submit_application():
         }
         
         # Store in memory
-        applications.append(app_data)
-        print(f"Application {app_id} created successfully")
+        application_store.add(app_data)
+        logger.info("Application created", extra={"application_id": app_id, "license_type": license_type, "files": files_count})
+        
+        # Check the documents against the license requirements in the background
+        # The snapshot lets a worker in any process that shares the queue file run the job
+        app_data["verification_job_id"] = verification_queue.enqueue("verify_application", {
+            "application_id": app_id,
+            "application": {"license_type": license_type, "files": files_info},
+            "request_id": request_id_var.get(),
+        })
         
         # Save to Firestore if available
-        if db:
+        if get_db():
             try:
-                db.collection('applications').document(app_id).set(app_data)
-                print(f"Application {app_id} saved to Firestore")
-                
                 # Save client profile
                 client_profile = {
                     "name": applicant_name,
@@ -671,13 +767,19 @@ def submit_application():
                     "last_application_date": datetime.datetime.now().isoformat(),
                     "status": "active"
                 }
-                db.collection('clients').document(applicant_email).set(client_profile, merge=True)
-                print(f"Client profile saved for {applicant_email}")
+                if CLIENT_PROFILE_WRITE_BEHIND:
+                    commit_submission(firestore_access, app_id, app_data, applicant_email)
+                    write_behind.update('clients', applicant_email, client_profile)
+                else:
+                    # Application and profile commit together in one round-trip, or not at all
+                    commit_submission(firestore_access, app_id, app_data, applicant_email, client_profile)
+                logger.debug("Application %s saved to Firestore", app_id)
                 
+            # The application is held in memory either way; a slow Firestore only costs the deadline
             except Exception as firestore_error:
-                print(f"Warning: Firestore save failed: {firestore_error}")
+                logger.warning("Firestore save failed for application %s: %s", app_id, firestore_error)
         else:
-            print("Using mock data storage (Firestore not available)")
+            logger.debug("Using mock data storage (Firestore not available)")
         
         return jsonify({
             "message": "Application submitted successfully",
@@ -686,27 +788,154 @@ def submit_application():
         }), 201
         
     except Exception as e:
-        print(f"ERROR: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error submitting application")
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
+@api.route("/files/<digest>/<filename>", methods=["GET"])
+def get_file(digest, filename):
+    """Serve a stored document by content hash"""
+    try:
+        path = file_storage.path_for(digest)
+    except ValueError:
+        return jsonify({"error": "File not found"}), 404
+    if path is None:
+        if not file_storage.exists(digest):
+            return jsonify({"error": "File not found"}), 404
+        return send_file(file_storage.open(digest), download_name=filename, etag=digest)
+    if not os.path.exists(path):
+        return jsonify({"error": "File not found"}), 404
+    return send_file(path, download_name=filename, etag=digest, max_age=31536000)
+
+def verification_status(app_id):
+    app = application_store.get(app_id)
+    if not app:
+        return None
+    job = verification_queue.get(app["verification_job_id"]) if app.get("verification_job_id") else None
+    verification = app.get("document_verification")
+    # The job may have run in another process; its result is in the shared queue
+    if job and job["status"] == "done" and job["result"] and (verification or {}).get("status") != "complete":
+        verification = job["result"]
+    return {
+        "application_id": app_id,
+        "verification": verification,
+        "job": {k: job[k] for k in ("status", "progress", "message", "error", "attempts")} if job else None,
+    }
+
+@api.route("/applications/<app_id>/verification", methods=["GET"])
+def get_verification(app_id):
+    """Poll the document verification of an application"""
+    status = verification_status(app_id)
+    if status is None:
+        return jsonify({"error": "Application not found"}), 404
+    return jsonify(status), 200
+
+@api.route("/applications/<app_id>/verification/stream", methods=["GET"])
+def stream_verification(app_id):
+    """Server-sent events with verification progress until the job finishes"""
+    if verification_status(app_id) is None:
+        return jsonify({"error": "Application not found"}), 404
+    if not verification_stream_slots.acquire(blocking=False):
+        response = jsonify({"error": "Too many open verification streams; poll /applications/<id>/verification instead"})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+
+    def events():
+        last = None
+        deadline = time.time() + VERIFICATION_STREAM_SECONDS
+        while time.time() < deadline:
+            status = verification_status(app_id)
+            job = status["job"] or {}
+            if status != last:
+                yield f"data: {json.dumps(status)}\n\n"
+                last = status
+            if job.get("status") in ("done", "failed") or status["verification"].get("status") == "complete":
+                return
+            time.sleep(0.5)
+
+    response = Response(events(), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    # Runs when the server closes the response, even if the client left before the first event
+    response.call_on_close(verification_stream_slots.release)
+    return response
+
+# ─── Resumable Upload Endpoints ────────────────────────────────────────────
+
+@api.route("/uploads", methods=["POST"])
+def create_upload():
+    """Start a resumable upload session"""
+    try:
+        data = request.get_json() or {}
+        session = upload_manager.create(data.get("filename"), data.get("size"), data.get("content_type"))
+        return jsonify(session), 201
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+
+@api.route("/uploads/<upload_id>", methods=["GET"])
+def get_upload(upload_id):
+    """Received chunks and byte ranges, used by clients to resume"""
+    try:
+        return jsonify(upload_manager.describe(upload_id)), 200
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+
+@api.route("/uploads/<upload_id>/chunks/<int:index>", methods=["PUT"])
+def put_upload_chunk(upload_id, index):
+    """Store one chunk; the body is the raw chunk bytes"""
+    try:
+        session = upload_manager.put_chunk(upload_id, index, request.stream, request.headers.get("X-Chunk-SHA256"))
+        return jsonify(session), 200
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+
+@api.route("/uploads/<upload_id>/complete", methods=["POST"])
+def complete_upload(upload_id):
+    """Assemble received chunks into document storage"""
+    try:
+        return jsonify(upload_manager.complete(upload_id)), 200
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+
+# ─── Document Extraction Endpoints ─────────────────────────────────────────
+
+@api.route("/extraction-jobs", methods=["POST"])
+def create_extraction_job():
+    """Queue extraction for stored PDFs, given by sha256 or by application id"""
+    data = request.get_json() or {}
+    documents = data.get("documents")
+    if documents is None and data.get("application_id"):
+        app = application_store.get(data["application_id"])
+        if not app:
+            return jsonify({"error": "Application not found"}), 404
+        documents = [
+            f["sha256"] for f in app.get("files", [])
+            if f.get("sha256") and f.get("filename", "").lower().endswith(".pdf")
+        ]
+    if not documents:
+        return jsonify({"error": "No PDF documents to extract"}), 400
+    for digest in documents:
+        if not isinstance(digest, str) or not file_storage.exists(digest):
+            return jsonify({"error": f"Document {digest} not found"}), 404
+
+    job = extraction_jobs.submit(documents)
+    return jsonify(job), 202
+
+@api.route("/extraction-jobs/<job_id>", methods=["GET"])
+def get_extraction_job(job_id):
+    """Poll an extraction job"""
+    job = extraction_jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
 # ─── Company Management Endpoints ──────────────────────────────────────────
 
-@app.route("/companies", methods=["GET"])
+@api.route("/companies", methods=["GET"])
 def get_companies():
     """Get all companies for admin dashboard"""
     try:
-        if db:
+        if get_db():
             # Try to get from Firestore
-            companies_ref = db.collection('companies')
-            companies_docs = companies_ref.stream()
-            
-            firestore_companies = []
-            for doc in companies_docs:
-                company_data = doc.to_dict()
-                company_data['id'] = doc.id
-                firestore_companies.append(company_data)
+            firestore_companies = [{**data, 'id': doc_id} for doc_id, data in firestore_access.stream('companies')]
             
             if firestore_companies:
                 return jsonify(firestore_companies), 200
@@ -714,12 +943,16 @@ def get_companies():
         # Fallback to mock data
         return jsonify(companies), 200
         
+    except FirestoreUnavailable as e:
+        logger.warning("Serving in-memory companies: %s", e)
+        return jsonify(companies), 200
+        
     except Exception as e:
-        print(f"Error fetching companies: {e}")
+        logger.exception("Error fetching companies")
         # Return mock data as fallback
         return jsonify(companies), 200
 
-@app.route("/companies", methods=["POST"])
+@api.route("/companies", methods=["POST"])
 def save_company():
     """Save or update company information from client dashboard"""
     try:
@@ -732,14 +965,8 @@ def save_company():
         representatives = data.get('representatives', [])
         user_email = data.get('userEmail', '')
         
-        print(f"Saving company data for user: {user_email}")
-        print(f"Company: {company_info.get('companyName', 'Unknown')}")
-        print(f"Representatives: {len(representatives)}")
-        
         # Generate company ID
-        company_id = generate_app_id()
-        while any(comp.get("id") == company_id for comp in companies):
-            company_id = generate_app_id()
+        company_id = company_ids.allocate()
         
         # Create company record
         company_data = {
@@ -761,19 +988,19 @@ def save_company():
         if existing_company_index is not None:
             # Update existing company
             companies[existing_company_index] = company_data
-            print(f"Updated existing company for {user_email}")
+            logger.info("Updated company", extra={"company_id": company_id, "representatives": len(representatives)})
         else:
             # Add new company
             companies.append(company_data)
-            print(f"Added new company for {user_email}")
+            logger.info("Added company", extra={"company_id": company_id, "representatives": len(representatives)})
         
         # Save to Firestore if available
-        if db:
+        if get_db():
             try:
-                db.collection('companies').document(company_id).set(company_data)
-                print(f"Company {company_id} saved to Firestore")
+                firestore_access.set('companies', company_id, company_data)
+                logger.debug("Company %s saved to Firestore", company_id)
             except Exception as firestore_error:
-                print(f"Warning: Firestore save failed: {firestore_error}")
+                logger.warning("Firestore save failed for company %s: %s", company_id, firestore_error)
         
         return jsonify({
             "message": "Company information saved successfully",
@@ -781,16 +1008,20 @@ def save_company():
         }), 201
         
     except Exception as e:
-        print(f"Error saving company: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error saving company")
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
 # ─── Stripe Payment Endpoints ──────────────────────────────────────────────
 
-@app.route("/create-payment-intent", methods=["POST"])
+def provider_unavailable_response(e):
+    response = jsonify({"error": "Payment provider temporarily unavailable, please retry shortly"})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 503
+
+@api.route("/create-payment-intent", methods=["POST"])
 def create_payment_intent():
     """Create a Stripe Payment Intent for card payments"""
+    stripe = get_stripe()
     try:
         data = request.get_json()
         
@@ -800,32 +1031,41 @@ def create_payment_intent():
             if field not in data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
         
+        # One key per user-initiated attempt; the SDK reuses it across its own retries
+        key = request.headers.get('Idempotency-Key') or str(uuid.uuid4())
+
         # Create payment intent with Stripe
-        intent = stripe.PaymentIntent.create(
-            amount=data['amount'],  # Amount in cents
-            currency=data['currency'],
-            automatic_payment_methods={
-                'enabled': True,
-            },
-            metadata={
-                'application_id': data['applicationId'],
-                'user_id': data['userId'],
-                'license_type': data.get('licenseType', ''),
-            }
-        )
+        with track_outbound("stripe", "payment_intent.create"):
+            intent = stripe.PaymentIntent.create(
+                amount=data['amount'],  # Amount in cents
+                currency=data['currency'],
+                automatic_payment_methods={
+                    'enabled': True,
+                },
+                metadata={
+                    'application_id': data['applicationId'],
+                    'user_id': data['userId'],
+                    'license_type': data.get('licenseType', ''),
+                },
+                idempotency_key=key,
+            )
         
         return jsonify({
             'clientSecret': intent.client_secret,
             'paymentIntentId': intent.id
         })
         
+    except (stripe.error.APIConnectionError, stripe.error.RateLimitError) as e:
+        # Still failing after the SDK's own retries
+        logger.warning("Stripe unavailable: %s", e)
+        return provider_unavailable_response(ProviderUnavailable("stripe", cause=e))
     except stripe.error.StripeError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f"Error creating payment intent: {e}")
+        logger.exception("Error creating payment intent")
         return jsonify({"error": "Internal server error"}), 500
 
-@app.route("/process-mobile-payment", methods=["POST"])
+@api.route("/process-mobile-payment", methods=["POST"])
 def process_mobile_payment():
     """Process mobile money payment (MTN, Airtel)"""
     try:
@@ -849,23 +1089,45 @@ def process_mobile_payment():
         else:
             amount_rwf = amount
         
-        # Simulate mobile money payment request
-        # In a real implementation, you would integrate with MTN Mobile Money API or Airtel Money API
-        payment_data = {
-            "payment_id": f"mobile_{application_id}_{datetime.datetime.now().timestamp()}",
-            "amount": amount_rwf,
-            "currency": "RWF",
-            "phone_number": phone_number,
-            "application_id": application_id,
-            "user_id": data['userId'],
-            "status": "pending",
-            "created_at": datetime.datetime.now().isoformat(),
-            "payment_method": "mobile_money"
-        }
+        provider = get_client("mobile_money")
+        if provider.base_url:
+            # One reference per user-initiated attempt, reused across the client's internal
+            # retries; a new attempt after a decline or expiry must not look like a duplicate
+            reference_id = request.headers.get('Idempotency-Key') or str(uuid.uuid4())
+            response = provider.request(
+                "POST", "/requesttopay", "request_to_pay", idempotency_key=reference_id,
+                headers={"X-Reference-Id": reference_id},
+                json={
+                    "amount": str(amount_rwf),
+                    "currency": "RWF",
+                    "externalId": application_id,
+                    "payer": {"partyIdType": "MSISDN", "partyId": phone_number},
+                    "payerMessage": "License application payment",
+                    "payeeNote": application_id,
+                },
+            )
+            if response.status_code >= 400:
+                logger.warning("Mobile money provider rejected payment: HTTP %s", response.status_code)
+                return jsonify({"error": "Payment provider rejected the request"}), 502
+            payment_data = {"payment_id": reference_id}
+        else:
+            # Simulate mobile money payment request when no provider is configured
+            with track_outbound("mobile_money", "request_to_pay"):
+                payment_data = {
+                    "payment_id": f"mobile_{application_id}_{datetime.datetime.now().timestamp()}",
+                    "amount": amount_rwf,
+                    "currency": "RWF",
+                    "phone_number": phone_number,
+                    "application_id": application_id,
+                    "user_id": data['userId'],
+                    "status": "pending",
+                    "created_at": datetime.datetime.now().isoformat(),
+                    "payment_method": "mobile_money"
+                }
         
         # Store payment record (in production, save to database)
         # Here we'll just simulate success
-        print(f"Mobile payment initiated: {payment_data}")
+        logger.info("Mobile payment initiated", extra={"payment_id": payment_data["payment_id"], "application_id": application_id})
         
         # Simulate sending SMS/USSD request to user's phone
         return jsonify({
@@ -876,13 +1138,16 @@ def process_mobile_payment():
             "status": "pending"
         }), 200
         
+    except ProviderUnavailable as e:
+        return provider_unavailable_response(e)
     except Exception as e:
-        print(f"Error processing mobile payment: {e}")
+        logger.exception("Error processing mobile payment")
         return jsonify({"error": "Internal server error"}), 500
 
-@app.route("/payment-webhook", methods=["POST"])
+@api.route("/payment-webhook", methods=["POST"])
 def payment_webhook():
     """Webhook to handle payment status updates from Stripe"""
+    stripe = get_stripe()
     try:
         payload = request.get_data()
         sig_header = request.headers.get('stripe-signature')
@@ -903,20 +1168,148 @@ def payment_webhook():
             application_id = payment_intent['metadata'].get('application_id')
             
             # Update application status to "paid"
-            app = next((a for a in applications if a.get('id') == application_id), None)
+            app = application_store.update(application_id, {
+                'payment_status': 'paid',
+                'payment_date': datetime.datetime.now().isoformat(),
+                'status': 'under_review',  # Move to next stage after payment
+            })
             if app:
-                app['payment_status'] = 'paid'
-                app['payment_date'] = datetime.datetime.now().isoformat()
-                app['status'] = 'under_review'  # Move to next stage after payment
-                print(f"Payment successful for application {application_id}")
+                logger.info("Payment successful", extra={"application_id": application_id})
         
         return jsonify({"status": "success"}), 200
         
     except Exception as e:
-        print(f"Error in payment webhook: {e}")
+        logger.exception("Error in payment webhook")
         return jsonify({"error": "Internal server error"}), 500
 
+# ─── Application factory ───────────────────────────────────────────────────
+
+_background_started = False
+
+def assign_request_id():
+    """Use the caller's X-Request-ID (e.g. from the load balancer) or make one"""
+    request_id = request.headers.get("X-Request-ID", "")[:64] or uuid.uuid4().hex
+    request.environ["app.request_id_token"] = request_id_var.set(request_id)
+
+def echo_request_id(response):
+    response.headers["X-Request-ID"] = request_id_var.get() or ""
+    return response
+
+def clear_request_id(exc=None):
+    token = request.environ.pop("app.request_id_token", None)
+    if token is not None:
+        request_id_var.reset(token)
+
+def start_request_timer():
+    # Label by route pattern, not path, so /applications/<id> stays one series
+    route = request.url_rule.rule if request.url_rule else "<unmatched>"
+    request.environ["app.metrics"] = (route, time.perf_counter())
+    metrics.http_in_flight.inc(route)
+
+def record_request(response):
+    route, started = request.environ.get("app.metrics", ("<unmatched>", None))
+    if started is not None:
+        metrics.http_request_duration.observe(time.perf_counter() - started, route, request.method)
+    metrics.http_requests.inc(route, request.method, str(response.status_code))
+    return response
+
+def end_request_timer(exc=None):
+    timing = request.environ.pop("app.metrics", None)
+    if timing is not None:
+        metrics.http_in_flight.dec(timing[0])
+
+def start_request_span():
+    """Server span for the request; continues the caller's trace if it sent traceparent"""
+    route = request.url_rule.rule if request.url_rule else "<unmatched>"
+    span = tracing.tracer.start_span(f"{request.method} {route}", kind="server", attributes={
+        "http.request.method": request.method,
+        "http.route": route,
+    }, traceparent=request.headers.get("traceparent"))
+    request.environ["app.span"] = (span, tracing.activate(span))
+
+def record_request_span(response):
+    span, _ = request.environ.get("app.span", (None, None))
+    if span is not None:
+        span.set_attribute("http.response.status_code", response.status_code)
+        if response.status_code >= 500:
+            span.status = ("error", f"HTTP {response.status_code}")
+    return response
+
+def end_request_span(exc=None):
+    span, token = request.environ.pop("app.span", (None, None))
+    if span is not None:
+        if exc is not None:
+            span.record_exception(exc)
+        tracing.deactivate(token)
+        span.end()
+
+def attach_catalog_listener():
+    """Initialize Firebase and listen for services catalog changes"""
+    db = get_db()
+    if db:
+        try:
+            catalog_cache.attach(db)
+            logger.info("Listening for services catalog changes")
+        except Exception as e:
+            logger.warning("Services listener failed, catalog will be read on demand: %s", e)
+
+def start_background_workers():
+    """
+    Start the per-process background threads: the services catalog listener and
+    the verification workers. Threads do not survive fork(), so under gunicorn
+    this runs in each worker (post_fork) rather than in the master.
+
+    Only threads are started here. Firebase is initialized on the listener's
+    own thread, so a new worker answers /health without waiting for it.
+    """
+    global _background_started
+    configure_logging()  # restarts the log listener thread after fork
+    if _background_started:
+        return
+    _background_started = True
+
+    threading.Thread(target=attach_catalog_listener, daemon=True, name="catalog-listener").start()
+    verification_workers.start()
+    if os.getenv("EXTRACTION_PRELOAD") == "1":
+        extraction_jobs.start(preload=True)
+
+def create_app(start_workers=True):
+    """
+    Build the Flask app; used by wsgi.py, the dev server and `flask --app app`.
+
+    Nothing here touches Firebase or Stripe, so a new worker can answer
+    /health before paying for those clients.
+    """
+    from flask_cors import CORS
+
+    configure_logging()
+    get_catalog()  # fail at boot, not on the first fallback request, if the catalog is invalid
+    app = Flask(__name__)
+    app.config["MAX_CONTENT_LENGTH"] = MAX_CONTENT_LENGTH
+    app.config["DEBUG"] = os.getenv("FLASK_DEBUG") == "1"
+    CORS(app, origins="*")
+    app.register_blueprint(api)
+    app.before_request(assign_request_id)
+    app.before_request(start_request_timer)
+    app.before_request(start_request_span)
+    app.after_request(echo_request_id)
+    app.after_request(record_request)
+    app.after_request(record_request_span)
+    app.teardown_request(clear_request_id)
+    app.teardown_request(end_request_timer)
+    app.teardown_request(end_request_span)
+    if os.getenv("TRUST_PROXY_HEADERS") == "1":
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
+    if start_workers:
+        start_background_workers()
+    return app
+
 if __name__ == "__main__":
-    print(f"Starting server with Firebase: {'Yes' if db else 'No (using mock data)'}")
-    print("Server starting on http://127.0.0.1:5002 (port 5000 has conflicts)")
+    # Development server only; production runs gunicorn -c gunicorn.conf.py wsgi:application
+    # With debug=True the reloader's parent process runs this too; only the
+    # child that serves requests (WERKZEUG_RUN_MAIN) starts background workers
+    app = create_app(start_workers=os.environ.get("WERKZEUG_RUN_MAIN") == "true")
+    logger.info("Starting server with Firebase: %s", 'Yes' if get_db() else 'No (using mock data)')
+    logger.info("Server starting on http://127.0.0.1:5002 (port 5000 has conflicts)")
     app.run(debug=True, port=5002, host='127.0.0.1')
@@ -8,6 +8,7 @@ from functools import wraps
 from collections import defaultdict
 import datetime
 from werkzeug.utils import secure_filename
+from service_catalog import get_catalog
 
 # ─── Load environment variables ─────────────────────────────────────────────
 load_dotenv()
@@ -43,104 +44,8 @@ def allowed_file(filename):
 applications = []
 
 def get_mock_license_data():
-    """Return mock license data for testing when Firestore is unavailable"""
-    return [
-        {
-            "name": "Business Licenses",
-            "licenses": [
-                {
-                    "id": "bl_001",
-                    "name": "Import/Export License",
-                    "application_requirements": [
-                        "Business registration certificate",
-                        "Tax clearance certificate",
-                        "Bank guarantee letter",
-                        "Business plan"
-                    ],
-                    "renewal_requirements": [
-                        "Updated financial statements",
-                        "Tax compliance certificate"
-                    ],
-                    "first_time_application_fee": 50,
-                    "renewal_application_fee": 30,
-                    "first_time_license_fee": 200,
-                    "renewal_license_fee": 150,
-                    "validity": 2,
-                    "processing_time": 14
-                },
-                {
-                    "id": "bl_002", 
-                    "name": "Trading License",
-                    "application_requirements": [
-                        "RDB certificate",
-                        "Company constitution",
-                        "Proof of premises",
-                        "Financial statements"
-                    ],
-                    "renewal_requirements": [
-                        "Updated RDB certificate",
-                        "Annual financial report"
-                    ],
-                    "first_time_application_fee": 25,
-                    "renewal_application_fee": 15,
-                    "first_time_license_fee": 100,
-                    "renewal_license_fee": 75,
-                    "validity": 1,
-                    "processing_time": 7
-                }
-            ]
-        },
-        {
-            "name": "Professional Licenses", 
-            "licenses": [
-                {
-                    "id": "pl_001",
-                    "name": "Engineering License",
-                    "application_requirements": [
-                        "Academic credentials",
-                        "Professional experience certificate",
-                        "Character reference letters",
-                        "Professional insurance"
-                    ],
-                    "renewal_requirements": [
-                        "Continuing education certificates",
-                        "Professional development record"
-                    ],
-                    "first_time_application_fee": 75,
-                    "renewal_application_fee": 40,
-                    "first_time_license_fee": 300,
-                    "renewal_license_fee": 200,
-                    "validity": 3,
-                    "processing_time": 21
-                }
-            ]
-        },
-        {
-            "name": "Transport Licenses",
-            "licenses": [
-                {
-                    "id": "tl_001",
-                    "name": "Commercial Transport License",
-                    "application_requirements": [
-                        "Valid driving license",
-                        "Vehicle inspection certificate",
-                        "Insurance documents",
-                        "Route operation plan"
-                    ],
-                    "renewal_requirements": [
-                        "Updated vehicle inspection",
-                        "Insurance renewal documents"
-                    ],
-                    "first_time_application_fee": 40,
-                    "renewal_application_fee": 20,
-                    "first_time_license_fee": 120,
-                    "renewal_license_fee": 80,
-                    "validity": 1,
-                    "processing_time": 10
-                }
-            ]
-        }
-    ]
+    """Bundled catalog (catalog/services.json), served when Firestore is unavailable"""
+    return get_catalog().categories
 
 @app.route('/')
 def home():
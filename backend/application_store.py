@@ -0,0 +1,240 @@
+"""
+Indexed storage for license applications.
+
+Applications are kept in a dict keyed by id with secondary indexes on
+applicant email and status, so lookups from the API and the payment webhook
+no longer scan every application. Per-client counters are maintained as
+applications are added or change status. IdAllocator hands out unique short
+ids by checking a reserved set instead of the application list.
+"""
+
+import base64
+import bisect
+import json
+import threading
+
+from user_store import normalize_email
+
+
+def encode_cursor(key):
+    """Opaque pagination cursor for a (submitted_at, id) sort key"""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        submitted_at, app_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (str(submitted_at), str(app_id))
+    except Exception:
+        raise ValueError("Invalid cursor") from None
+
+
+# Fields derived on request, so list views need not fetch heavy fields to summarize them
+COMPUTED_FIELDS = {
+    "files_count": lambda application: len(application.get("files") or []),
+}
+
+
+def project(application, fields):
+    """Keep only the requested fields (plus id) of an application; computed fields are derived"""
+    if not fields:
+        return application
+    projected = {k: application[k] for k in ("id", *fields) if k in application}
+    for field in fields:
+        if field in COMPUTED_FIELDS:
+            projected[field] = COMPUTED_FIELDS[field](application)
+    return projected
+
+
+class IdAllocator:
+    """Allocate unique ids from a random generator using a set of reserved ids"""
+
+    def __init__(self, generate, reserved=()):
+        self._generate = generate
+        self._reserved = set(reserved)
+        self._lock = threading.Lock()
+
+    def allocate(self):
+        with self._lock:
+            new_id = self._generate()
+            while new_id in self._reserved:
+                new_id = self._generate()
+            self._reserved.add(new_id)
+            return new_id
+
+    def reserve(self, existing_id):
+        with self._lock:
+            self._reserved.add(existing_id)
+
+    def __contains__(self, existing_id):
+        return existing_id in self._reserved
+
+
+class ClientStats:
+    """Running application counters for one applicant email"""
+
+    __slots__ = ("total", "by_status", "last_date", "last_type")
+
+    def __init__(self):
+        self.total = 0
+        self.by_status = {}
+        self.last_date = None
+        self.last_type = None
+
+    def added(self, application):
+        self.total += 1
+        status = application.get("status")
+        self.by_status[status] = self.by_status.get(status, 0) + 1
+        submitted_at = application.get("submitted_at") or ""
+        if self.last_date is None or submitted_at >= self.last_date:
+            self.last_date = submitted_at
+            self.last_type = application.get("license_type")
+
+    def status_changed(self, old_status, new_status):
+        self.by_status[old_status] -= 1
+        self.by_status[new_status] = self.by_status.get(new_status, 0) + 1
+
+    def summary(self):
+        return {
+            "applications_count": self.total,
+            "pending_applications": self.by_status.get("pending", 0),
+            "approved_applications": self.by_status.get("approved", 0),
+            "rejected_applications": self.by_status.get("rejected", 0),
+            "last_application_date": self.last_date,
+            "last_application_type": self.last_type,
+        }
+
+
+EMPTY_CLIENT_SUMMARY = ClientStats().summary()
+
+
+class ApplicationStore:
+    """Applications indexed by id, applicant email and status"""
+
+    def __init__(self, applications=None):
+        self._lock = threading.RLock()
+        self._by_id = {}
+        # Secondary indexes map a key to {application id: None}, an insertion-ordered set
+        self._by_email = {}
+        self._by_status = {}
+        self._client_stats = {}
+        # (submitted_at, id) keys kept sorted for cursor pagination
+        self._order = []
+        for application in applications or []:
+            self.add(application)
+
+    @staticmethod
+    def _index_add(index, key, app_id):
+        index.setdefault(key, {})[app_id] = None
+
+    @staticmethod
+    def _index_remove(index, key, app_id):
+        ids = index.get(key)
+        if ids is not None:
+            ids.pop(app_id, None)
+            if not ids:
+                del index[key]
+
+    def add(self, application):
+        app_id = application["id"]
+        with self._lock:
+            if app_id in self._by_id:
+                raise KeyError(f"Application {app_id} already exists")
+            email = normalize_email(application.get("applicant_email"))
+            self._by_id[app_id] = application
+            self._index_add(self._by_email, email, app_id)
+            self._index_add(self._by_status, application.get("status"), app_id)
+            bisect.insort(self._order, self._sort_key(application))
+            self._client_stats.setdefault(email, ClientStats()).added(application)
+
+    @staticmethod
+    def _sort_key(application):
+        return (application.get("submitted_at") or "", application["id"])
+
+    def get(self, app_id):
+        return self._by_id.get(app_id)
+
+    def update(self, app_id, fields):
+        """Merge fields into an application, keeping the status index current"""
+        with self._lock:
+            application = self._by_id.get(app_id)
+            if application is None:
+                return None
+            old_status = application.get("status")
+            application.update(fields)
+            new_status = application.get("status")
+            if new_status != old_status:
+                self._index_remove(self._by_status, old_status, app_id)
+                self._index_add(self._by_status, new_status, app_id)
+                stats = self._client_stats.get(normalize_email(application.get("applicant_email")))
+                if stats is not None:
+                    stats.status_changed(old_status, new_status)
+            return application
+
+    def by_email(self, email):
+        ids = self._by_email.get(normalize_email(email), {})
+        return [self._by_id[app_id] for app_id in list(ids)]
+
+    def by_status(self, status):
+        ids = self._by_status.get(status, {})
+        return [self._by_id[app_id] for app_id in list(ids)]
+
+    def query(self, status=None, license_type=None, applicant_email=None,
+              cursor=None, limit=None, descending=False):
+        """
+        Filtered page of applications ordered by submitted_at.
+
+        Returns (applications, next_cursor_key); next_cursor_key is the sort key
+        of the last returned application when more results remain, else None.
+        Filters on email or status start from their index instead of the full list.
+        """
+        with self._lock:
+            if applicant_email is not None:
+                candidates = self._by_email.get(normalize_email(applicant_email), {})
+            elif status is not None:
+                candidates = self._by_status.get(status, {})
+            else:
+                candidates = None
+
+            if candidates is None:
+                keys = self._order
+            else:
+                keys = sorted(self._sort_key(self._by_id[app_id]) for app_id in candidates)
+
+            if descending:
+                end = bisect.bisect_left(keys, cursor) if cursor else len(keys)
+                ordered = (keys[i] for i in range(end - 1, -1, -1))
+            else:
+                start = bisect.bisect_right(keys, cursor) if cursor else 0
+                ordered = (keys[i] for i in range(start, len(keys)))
+
+            results = []
+            last_key = None
+            for key in ordered:
+                application = self._by_id[key[1]]
+                if status is not None and application.get("status") != status:
+                    continue
+                if license_type is not None and application.get("license_type") != license_type:
+                    continue
+                if limit is not None and len(results) == limit:
+                    return results, last_key
+                results.append(application)
+                last_key = key
+            return results, None
+
+    def client_summary(self, email):
+        """Precomputed application counters for one applicant"""
+        with self._lock:
+            stats = self._client_stats.get(normalize_email(email))
+            return stats.summary() if stats is not None else dict(EMPTY_CLIENT_SUMMARY)
+
+    def all(self):
+        return list(self._by_id.values())
+
+    def __contains__(self, app_id):
+        return app_id in self._by_id
+
+    def __len__(self):
+        return len(self._by_id)
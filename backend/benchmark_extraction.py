@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Compare extraction backends on the bundled business-plan PDFs.
+
+Each backend runs in its own process so resident memory is measured cleanly.
+Reports model load time, resident memory, per-document latency and throughput,
+and how many extracted slots match the PyTorch backend.
+
+Usage:
+    python benchmark_extraction.py
+    python benchmark_extraction.py --backends torch torch-int8 onnx --runs 5
+    python benchmark_extraction.py --backends torch onnx --model models/flan-t5-small-onnx
+
+Exits non-zero when a backend's parity with torch is below its threshold.
+fp32 backends (onnx from a plain export) must match torch exactly (1.0). int8
+backends (torch-int8, onnx from `export_onnx.py --quantize`) change the
+weights, so answers may drift, and they must match at least 80% of slots.
+--min-parity / --min-int8-parity override the two thresholds.
+"""
+
+import argparse
+import glob
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Share of (document, slot) answers that must match torch
+FP32_MIN_PARITY = 1.0
+INT8_MIN_PARITY = 0.8
+
+
+def rss_mb():
+    """Current resident set size in MB"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        pass
+    # Peak RSS; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_worker(backend, model, runs, batch_size):
+    """Benchmark one backend in this process and print a JSON report"""
+    from document_extraction import FlanT5Extractor
+    from pdf_text import iter_pages
+
+    pdfs = sorted(glob.glob(os.path.join(HERE, "*.pdf")))
+    texts = ["\n\n".join(iter_pages(path)) for path in pdfs]
+
+    baseline = rss_mb()
+    extractor = FlanT5Extractor(model_name=model, batch_size=batch_size, backend=backend)
+    started = time.perf_counter()
+    extractor.load()
+    load_seconds = time.perf_counter() - started
+    extractor.extract(texts[0])  # warm-up
+
+    latencies = []
+    for _ in range(runs):
+        for text in texts:
+            started = time.perf_counter()
+            extractor.extract(text)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    outputs = extractor.extract_many(texts)
+    batch_seconds = time.perf_counter() - started
+
+    print(json.dumps({
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "rss_mb": rss_mb() - baseline,
+        "latency_ms_mean": statistics.mean(latencies) * 1000,
+        "latency_ms_p50": statistics.median(latencies) * 1000,
+        "latency_ms_max": max(latencies) * 1000,
+        "docs_per_second": len(texts) / batch_seconds,
+        "outputs": dict(zip((os.path.basename(p) for p in pdfs), outputs)),
+    }))
+
+
+def parity(reference, outputs):
+    """Fraction of (document, slot) answers identical to the reference"""
+    total = matches = 0
+    for document, slots in reference.items():
+        for slot, answer in slots.items():
+            total += 1
+            matches += outputs.get(document, {}).get(slot, "").strip().lower() == answer.strip().lower()
+    return matches / total if total else 1.0
+
+
+def is_int8(backend, model):
+    """True for quantized backends; ORTQuantizer writes ort_config.json next to int8 exports"""
+    if backend == "torch-int8":
+        return True
+    return backend == "onnx" and bool(model) and os.path.exists(os.path.join(model, "ort_config.json"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark flan-t5 extraction backends")
+    parser.add_argument("--backends", nargs="+", default=["torch", "torch-int8", "onnx"])
+    parser.add_argument("--model", default=None, help="model name or export dir (default: google/flan-t5-small)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--min-parity", type=float, default=FP32_MIN_PARITY, help="threshold for fp32 backends")
+    parser.add_argument("--min-int8-parity", type=float, default=INT8_MIN_PARITY, help="threshold for int8 backends")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    from document_extraction import MODEL_NAME
+
+    if args.worker:
+        run_worker(args.worker, args.model or MODEL_NAME, args.runs, args.batch_size)
+        return
+
+    backends = args.backends if "torch" in args.backends else ["torch", *args.backends]
+    reports = {}
+    for backend in backends:
+        # The torch reference always uses the hub weights, other backends may use an export dir
+        model = MODEL_NAME if backend.startswith("torch") else (args.model or MODEL_NAME)
+        command = [sys.executable, __file__, "--worker", backend, "--model", model,
+                   "--runs", str(args.runs), "--batch-size", str(args.batch_size)]
+        print(f"Running {backend}...")
+        result = subprocess.run(command, cwd=HERE, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"❌ {backend} failed:\n{result.stderr.strip().splitlines()[-1] if result.stderr else ''}")
+            continue
+        reports[backend] = json.loads(result.stdout.strip().splitlines()[-1])
+
+    if "torch" not in reports:
+        print("❌ The torch reference backend did not run; cannot check parity")
+        sys.exit(1)
+
+    reference = reports["torch"]["outputs"]
+    print(f"\n{'backend':<12}{'load s':>8}{'RSS MB':>9}{'mean ms':>10}{'p50 ms':>9}{'max ms':>9}{'docs/s':>8}{'parity':>8}{'min':>6}")
+    failed = []
+    for backend, report in reports.items():
+        score = parity(reference, report["outputs"])
+        threshold = args.min_int8_parity if is_int8(backend, args.model) else args.min_parity
+        if score < threshold:
+            failed.append(f"{backend} {score:.0%} < {threshold:.0%}")
+        print(f"{backend:<12}{report['load_seconds']:>8.2f}{report['rss_mb']:>9.0f}"
+              f"{report['latency_ms_mean']:>10.0f}{report['latency_ms_p50']:>9.0f}"
+              f"{report['latency_ms_max']:>9.0f}{report['docs_per_second']:>8.2f}{score:>8.0%}{threshold:>6.0%}")
+
+    if failed:
+        print(f"\n❌ Parity with torch too low: {', '.join(failed)}")
+        sys.exit(1)
+    print("\n✅ Every backend within its parity threshold")
+
+
+if __name__ == "__main__":
+    main()
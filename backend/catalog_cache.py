@@ -0,0 +1,253 @@
+"""
+In-process cache for the license catalog served by /get_services.
+
+The grouped category list is kept in memory and updated from a Firestore
+``on_snapshot`` listener on the ``services`` collection, so requests no longer
+stream the whole collection. ``version`` is the content hash of the grouped
+catalog, the same value as the ETag of /services, so it is identical across
+processes and restarts and only moves when the content does. When Firestore is
+unreachable the last catalog it returned is served from disk.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from circuit_breaker import Backoff
+from firestore_access import FirestoreUnavailable
+from http_cache import PreparedJSONCache, content_hash, serialize
+
+logger = logging.getLogger(__name__)
+
+
+def flatten_requirements(value):
+    """Flatten a nested { "documents": [...] } requirement field into a plain list"""
+    if isinstance(value, dict) and 'documents' in value:
+        return value['documents']
+    return value if isinstance(value, list) else []
+
+
+def normalize_service(doc_id, item):
+    """Turn a raw `services` document into the license object returned to clients"""
+    return {
+        "id": doc_id,
+        "category": item.get('category', 'Uncategorized'),
+        "name": item.get("name", ""),
+        "application_requirements": flatten_requirements(item.get('application_requirements', {})),
+        "renewal_requirements": flatten_requirements(item.get('renewal_requirements', {})),
+        "first_time_application_fee": item.get("first_time_application_fee", 0),
+        "renewal_application_fee": item.get("renewal_application_fee", 0),
+        "first_time_license_fee": item.get("first_time_license_fee", 0),
+        "renewal_license_fee": item.get("renewal_license_fee", 0),
+        "validity": item.get("validity", 0),
+        "processing_time": item.get("processing_time", 0),
+    }
+
+
+def group_by_category(services):
+    """Group normalized services into [{"name": ..., "licenses": [...]}, ...]"""
+    categories_dict = defaultdict(list)
+    for svc in services:
+        license_obj = {k: v for k, v in svc.items() if k != "category"}
+        categories_dict[svc["category"]].append(license_obj)
+    return [{"name": name, "licenses": licenses} for name, licenses in categories_dict.items()]
+
+
+class CatalogCache:
+    """
+    Grouped services catalog kept in sync with Firestore by a change listener.
+
+    Every catalog read from Firestore is also saved to `lkg_path` as the last
+    known good copy. Requests never read Firestore themselves: on a cold cache
+    the saved copy is served at once (`stale` is True) and a single background
+    thread does the first load, retrying with exponential backoff. Without a
+    saved copy, requests wait up to `cold_wait` seconds for that thread's first
+    attempt and then get an empty catalog, so the caller serves the bundled one.
+
+    Reads go through a FirestoreAccess, so they share the collection's
+    deadline and circuit breaker with every other caller.
+    """
+
+    def __init__(self, access, collection='services', lkg_path=None, backoff=None, cold_wait=1.0):
+        self.access = access
+        self.collection = collection
+        self.lkg_path = lkg_path
+        self.cold_wait = cold_wait
+        self.breaker = access.breaker(collection)
+        self.backoff = backoff or Backoff(initial=1.0, maximum=60.0)
+        self._lock = threading.Lock()
+        self._services = {}       # doc id -> normalized service
+        self._categories = None   # grouped list, rebuilt lazily after a change
+        self._version = None      # content hash of _categories, None while empty
+        self._loaded = False
+        self._stale = False       # serving the on-disk copy while Firestore is failing
+        self._refreshing = False
+        self._first_attempt = threading.Event()  # set once the refresh thread has tried Firestore
+        self._watch = None
+        self._prepared = PreparedJSONCache()
+        self._payload = None
+        self._payload_version = None
+
+    @property
+    def version(self):
+        """Content hash of the catalog in memory, None when empty; never reads Firestore"""
+        with self._lock:
+            return self._current()[1]
+
+    @property
+    def stale(self):
+        return self._stale
+
+    def attach(self, db):
+        """Start listening for changes on the services collection"""
+        self._watch = db.collection(self.collection).on_snapshot(self._on_snapshot)
+
+    def detach(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+
+    def _on_snapshot(self, col_snapshot, changes, read_time):
+        # The first snapshot reports every document as ADDED, later ones only the delta
+        with self._lock:
+            if self._stale:
+                # A full snapshot replaces the on-disk copy rather than merging into it
+                self._services = {}
+            for change in changes:
+                doc = change.document
+                if change.type.name == 'REMOVED':
+                    self._services.pop(doc.id, None)
+                else:
+                    self._services[doc.id] = normalize_service(doc.id, doc.to_dict() or {})
+            self._categories = None
+            self._loaded = True
+            self._stale = False
+            services = dict(self._services)
+        self.breaker.record_success()
+        self._save_last_known_good(services)
+
+    def load(self):
+        """
+        Read the whole collection once, used until the listener has delivered.
+
+        Raises FirestoreUnavailable when the breaker is open or the read fails
+        transiently; other errors propagate without touching the breaker.
+        """
+        services = {doc_id: normalize_service(doc_id, item) for doc_id, item in self.access.stream(self.collection)}
+        with self._lock:
+            if not self._loaded or self._stale:
+                self._services = services
+                self._categories = None
+                self._loaded = True
+                self._stale = False
+        self._save_last_known_good(services)
+
+    def invalidate(self):
+        """Drop everything so the next read goes back to Firestore"""
+        with self._lock:
+            self._services = {}
+            self._categories = None
+            self._loaded = False
+            self._stale = False
+
+    # ─── Last known good copy ──────────────────────────────────────────────
+
+    def _save_last_known_good(self, services):
+        if not self.lkg_path or not services:
+            return
+        try:
+            tmp_path = f"{self.lkg_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"saved_at": time.time(), "services": services}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.lkg_path)
+        except OSError as e:
+            logger.warning("Could not save last known good catalog: %s", e)
+
+    def _load_last_known_good(self):
+        """Serve the on-disk copy; returns False if there is none"""
+        if not self.lkg_path:
+            return False
+        try:
+            with open(self.lkg_path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False
+        with self._lock:
+            if self._loaded:
+                return True
+            self._services = saved["services"]
+            self._categories = None
+            self._loaded = True
+            self._stale = True
+        age = time.time() - saved.get("saved_at", 0)
+        logger.warning("Serving last known good catalog saved %.0f s ago", age)
+        return True
+
+    # ─── Background load ───────────────────────────────────────────────────
+
+    def _start_refresh(self):
+        """Start the single thread that loads from Firestore; no-op if it is running"""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+            self._first_attempt.clear()
+        threading.Thread(target=self._refresh, daemon=True, name="catalog-refresh").start()
+
+    def _refresh(self):
+        self.backoff.reset()
+        delay = 0.0
+        try:
+            while True:
+                time.sleep(delay)
+                try:
+                    self.load()
+                    logger.info("Catalog loaded from Firestore")
+                    return
+                except FirestoreUnavailable as e:
+                    logger.warning("Catalog load failed, retrying in the background: %s", e)
+                except Exception:
+                    logger.exception("Catalog load failed, retrying in the background")
+                finally:
+                    self._first_attempt.set()
+                delay = max(self.breaker.retry_after(), self.backoff.next_delay())
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        # Serve the saved copy straight away; Firestore is only read in the background
+        self._load_last_known_good()
+        self._start_refresh()
+        if not self._loaded:
+            # Nothing saved yet: give the first read a moment, then let the caller fall back
+            self._first_attempt.wait(self.cold_wait)
+
+    def _current(self):
+        """(categories, version) for the services in memory; call with the lock held"""
+        if self._categories is None:
+            self._categories = group_by_category(self._services.values())
+            self._version = content_hash(serialize(self._categories)) if self._categories else None
+        return self._categories, self._version
+
+    def get_categories(self, db):
+        """Return (categories, version); Firestore is only read on a cold cache"""
+        self._ensure_loaded()
+        with self._lock:
+            return self._current()
+
+    def get_payload(self, db):
+        """Return (PreparedJSON or None when the catalog is empty, version)"""
+        categories, version = self.get_categories(db)
+        if not categories:
+            return None, version
+        with self._lock:
+            if self._payload_version != version:
+                self._payload = self._prepared.get(categories)
+                self._payload_version = version
+            return self._payload, version
@@ -0,0 +1,229 @@
+"""
+Resumable chunked uploads for large license documents.
+
+Protocol:
+  POST /uploads                         {filename, size, content_type} -> session
+  PUT  /uploads/<id>/chunks/<index>     raw chunk bytes
+  GET  /uploads/<id>                    received chunks and byte ranges
+  POST /uploads/<id>/complete           assemble into content-addressed storage
+
+Chunks are written to <staging>/<id>/<index>.part, so a dropped connection
+only costs the chunk in flight. Session state lives next to the chunks in
+session.json and survives a server restart. Finalized uploads are referenced
+from applications by upload id.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+
+from file_storage import CHUNK_SIZE as COPY_SIZE
+
+
+class UploadError(Exception):
+    """Client-side protocol error; carries the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class _ChunkReader:
+    """Read a sequence of chunk files as one stream"""
+
+    def __init__(self, paths):
+        self._paths = iter(paths)
+        self._current = None
+
+    def read(self, size=-1):
+        while True:
+            if self._current is None:
+                path = next(self._paths, None)
+                if path is None:
+                    return b""
+                self._current = open(path, "rb")
+            data = self._current.read(size)
+            if data:
+                return data
+            self._current.close()
+            self._current = None
+
+
+class ChunkedUploadManager:
+    def __init__(self, storage, staging_dir, chunk_size=4 * 1024 * 1024,
+                 max_size=200 * 1024 * 1024, ttl_hours=24):
+        self.storage = storage
+        self.staging_dir = staging_dir
+        self.chunk_size = chunk_size
+        self.max_size = max_size
+        self.ttl = datetime.timedelta(hours=ttl_hours)
+        self._lock = threading.Lock()
+        os.makedirs(staging_dir, exist_ok=True)
+
+    # ─── Session metadata ──────────────────────────────────────────────────
+
+    def _dir(self, upload_id):
+        try:
+            uuid.UUID(hex=upload_id)
+        except ValueError:
+            raise UploadError("Upload not found", 404) from None
+        return os.path.join(self.staging_dir, upload_id)
+
+    def _load(self, upload_id):
+        path = os.path.join(self._dir(upload_id), "session.json")
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise UploadError("Upload not found", 404) from None
+
+    def _save(self, session):
+        directory = self._dir(session["upload_id"])
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "w") as f:
+            json.dump(session, f)
+        os.replace(tmp_path, os.path.join(directory, "session.json"))
+
+    def _total_chunks(self, session):
+        return max(1, -(-session["size"] // session["chunk_size"]))
+
+    def _expected_length(self, session, index):
+        if index == self._total_chunks(session) - 1:
+            return session["size"] - index * session["chunk_size"]
+        return session["chunk_size"]
+
+    def _received(self, session):
+        directory = self._dir(session["upload_id"])
+        return sorted(
+            int(name[:-5]) for name in os.listdir(directory) if name.endswith(".part")
+        )
+
+    # ─── Protocol operations ───────────────────────────────────────────────
+
+    def create(self, filename, size, content_type=None):
+        if not filename:
+            raise UploadError("filename is required")
+        if not isinstance(size, int) or size < 0:
+            raise UploadError("size must be a non-negative integer")
+        if size > self.max_size:
+            raise UploadError(f"File exceeds maximum upload size of {self.max_size} bytes", 413)
+
+        self.purge_expired()
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._dir(upload_id))
+        session = {
+            "upload_id": upload_id,
+            "filename": filename,
+            "content_type": content_type,
+            "size": size,
+            "chunk_size": self.chunk_size,
+            "state": "open",
+            "created_at": datetime.datetime.now().isoformat(),
+        }
+        self._save(session)
+        return self.describe(upload_id, session)
+
+    def put_chunk(self, upload_id, index, stream, checksum=None):
+        """Write one chunk from a stream; re-sending a chunk overwrites it"""
+        session = self._load(upload_id)
+        if session["state"] != "open":
+            raise UploadError("Upload already finalized", 409)
+        if index < 0 or index >= self._total_chunks(session):
+            raise UploadError("Chunk index out of range")
+
+        expected = self._expected_length(session, index)
+        directory = self._dir(upload_id)
+        hasher = hashlib.sha256()
+        written = 0
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    data = stream.read(COPY_SIZE)
+                    if not data:
+                        break
+                    written += len(data)
+                    if written > expected:
+                        raise UploadError(f"Chunk {index} must be {expected} bytes")
+                    hasher.update(data)
+                    out.write(data)
+            if written != expected:
+                raise UploadError(f"Chunk {index} must be {expected} bytes")
+            if checksum and checksum.lower() != hasher.hexdigest():
+                raise UploadError(f"Chunk {index} checksum mismatch")
+            os.replace(tmp_path, os.path.join(directory, f"{index}.part"))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return self.describe(upload_id, session)
+
+    def describe(self, upload_id, session=None):
+        """Session status including received chunks merged into byte ranges"""
+        session = session or self._load(upload_id)
+        received = self._received(session) if session["state"] == "open" else []
+        ranges = []
+        for index in received:
+            start = index * session["chunk_size"]
+            end = start + self._expected_length(session, index)
+            if ranges and ranges[-1][1] == start:
+                ranges[-1][1] = end
+            else:
+                ranges.append([start, end])
+        total = self._total_chunks(session)
+        return {
+            **session,
+            "total_chunks": total,
+            "received_chunks": received,
+            "received_ranges": ranges,
+            "missing_chunks": sorted(set(range(total)) - set(received)) if session["state"] == "open" else [],
+        }
+
+    def complete(self, upload_id):
+        """Assemble all chunks into storage and mark the session finalized"""
+        with self._lock:
+            session = self._load(upload_id)
+            if session["state"] == "complete":
+                return self.describe(upload_id, session)
+
+            received = self._received(session)
+            missing = sorted(set(range(self._total_chunks(session))) - set(received))
+            if missing and session["size"] > 0:
+                raise UploadError(f"Missing chunks: {missing}", 409)
+
+            directory = self._dir(upload_id)
+            stored = self.storage.put_stream(
+                _ChunkReader(os.path.join(directory, f"{i}.part") for i in received)
+            )
+            for index in received:
+                os.remove(os.path.join(directory, f"{index}.part"))
+
+            session.update({
+                "state": "complete",
+                "sha256": stored.sha256,
+                "completed_at": datetime.datetime.now().isoformat(),
+            })
+            self._save(session)
+            return self.describe(upload_id, session)
+
+    def get_completed(self, upload_id):
+        """Finalized session for an upload id, or UploadError"""
+        session = self._load(upload_id)
+        if session["state"] != "complete":
+            raise UploadError(f"Upload {upload_id} is not finalized", 409)
+        return session
+
+    def purge_expired(self):
+        """Drop open sessions older than the TTL"""
+        cutoff = datetime.datetime.now() - self.ttl
+        for upload_id in os.listdir(self.staging_dir):
+            try:
+                session = self._load(upload_id)
+            except UploadError:
+                continue
+            if session["state"] == "open" and datetime.datetime.fromisoformat(session["created_at"]) < cutoff:
+                shutil.rmtree(self._dir(upload_id), ignore_errors=True)
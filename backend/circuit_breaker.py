@@ -0,0 +1,108 @@
+"""
+Circuit breaker and exponential backoff for calls to remote services.
+
+A breaker starts closed. After `failure_threshold` consecutive failures it
+opens, and callers skip the remote call and use their fallback. Once
+`reset_timeout` seconds have passed it goes half-open and lets a single probe
+through: success closes it, failure opens it again.
+"""
+
+import random
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a service whose breaker is open"""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name} unavailable (circuit open)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=5, reset_timeout=30, on_state_change=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_state_change = on_state_change
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def retry_after(self):
+        """Seconds until the breaker will allow a probe"""
+        with self._lock:
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)) if self._state == OPEN else 0.0
+
+    def allow(self):
+        """True if a call may go through; in half-open state only one probe at a time"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._set_state(HALF_OPEN)
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            if self._state != CLOSED:
+                self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                if self._state != OPEN:
+                    self._set_state(OPEN)
+
+    def release(self):
+        """End a call that says nothing about the service's health; frees the half-open probe"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _set_state(self, state):
+        previous, self._state = self._state, state
+        if self.on_state_change is not None:
+            self.on_state_change(self.name, previous, state)
+
+
+class Backoff:
+    """Exponential delays with full jitter: random in [0, min(maximum, initial * factor ** attempt)]"""
+
+    def __init__(self, initial=1.0, maximum=60.0, factor=2.0):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.attempt = 0
+
+    def next_delay(self):
+        cap = min(self.maximum, self.initial * self.factor ** self.attempt)
+        self.attempt += 1
+        return random.uniform(0, cap)
+
+    def reset(self):
+        self.attempt = 0
@@ -0,0 +1,252 @@
+"""
+Company-profile extraction from uploaded PDFs with google/flan-t5-small.
+
+Service version of document_check.ipynb. The model and tokenizer are loaded
+once per worker. Every (document, text chunk, question) prompt waiting in the
+queue is run through the model in padded batches, instead of one pipeline call
+per question with the whole document text. Long documents are split into
+windows that fit the model's input size.
+
+The inference backend is selectable (EXTRACTION_BACKEND):
+  torch       stock PyTorch weights
+  torch-int8  PyTorch with dynamic int8 quantization of the Linear layers
+  onnx        ONNX Runtime through optimum; model_name may point at a
+              directory written by export_onnx.py (optionally int8-quantized)
+benchmark_extraction.py compares their outputs, latency and memory.
+"""
+
+import collections
+import datetime
+import os
+import queue
+import threading
+import time
+import uuid
+
+MODEL_NAME = "google/flan-t5-small"
+BACKENDS = ("torch", "torch-int8", "onnx")
+
+# Slots extracted from each document (same as document_check.ipynb)
+QUESTIONS = {
+    "company name": "Extract the company name",
+    "focus": "Extract the company's main focus",
+    "services": "Extract the company's core services",
+}
+
+EMPTY_ANSWERS = {"", "none", "unknown", "n/a", "unanswerable"}
+
+
+def build_prompt(instruction, text):
+    return f"{instruction} from the following text:\n\n{text}\n\nAnswer concisely."
+
+
+class FlanT5Extractor:
+    """flan-t5 model held in memory and queried in batches"""
+
+    def __init__(self, model_name=MODEL_NAME, batch_size=16, max_input_tokens=512, max_new_tokens=64,
+                 backend="torch"):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown extraction backend {backend!r}, expected one of {BACKENDS}")
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+        self.max_input_tokens = max_input_tokens
+        self.max_new_tokens = max_new_tokens
+        self.tokenizer = None
+        self.model = None
+        self._lock = threading.Lock()
+        # One fast tokenizer and one model are shared by the extraction worker and
+        # the verification workers. Neither is safe to call concurrently (the Rust
+        # tokenizer raises "Already borrowed"), so every use is serialized.
+        self._inference_lock = threading.Lock()
+
+    def load(self):
+        """Load tokenizer and model once; later calls are no-ops"""
+        with self._lock:
+            if self.model is None:
+                from transformers import AutoTokenizer
+
+                self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                self.model = self._load_model()
+        return self
+
+    def _load_model(self):
+        if self.backend == "onnx":
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+            # A local export is used as-is; a hub name is exported on the fly
+            return ORTModelForSeq2SeqLM.from_pretrained(self.model_name, export=not os.path.isdir(self.model_name))
+
+        import torch
+        from transformers import AutoModelForSeq2SeqLM
+
+        model = AutoModelForSeq2SeqLM.from_pretrained(self.model_name)
+        model.eval()
+        if self.backend == "torch-int8":
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+
+    def chunk_text(self, text):
+        """Split text into windows that fit the encoder next to the longest instruction"""
+        with self._inference_lock:
+            overhead = max(
+                len(self.tokenizer(build_prompt(instruction, "")).input_ids) for instruction in QUESTIONS.values()
+            )
+            window = max(self.max_input_tokens - overhead, 32)
+            ids = self.tokenizer(text, add_special_tokens=False).input_ids
+            if not ids:
+                return [""]
+            return [
+                self.tokenizer.decode(ids[start:start + window], skip_special_tokens=True)
+                for start in range(0, len(ids), window)
+            ]
+
+    def generate(self, prompts):
+        """Answer a list of prompts, batch_size prompts per generate call"""
+        import torch
+
+        answers = []
+        for start in range(0, len(prompts), self.batch_size):
+            batch = prompts[start:start + self.batch_size]
+            # Locked per batch, so other callers can take turns between batches
+            with self._inference_lock:
+                inputs = self.tokenizer(
+                    batch, return_tensors="pt", padding=True, truncation=True, max_length=self.max_input_tokens
+                )
+                with torch.inference_mode():
+                    outputs = self.model.generate(**inputs, max_new_tokens=self.max_new_tokens, do_sample=False)
+                decoded = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+            answers.extend(text.strip() for text in decoded)
+        return answers
+
+    def extract_many(self, texts):
+        """Extract every slot from several documents with shared batches"""
+        self.load()
+        prompts = []
+        owners = []  # (document index, slot) for each prompt, in prompt order
+        for doc_index, text in enumerate(texts):
+            for chunk in self.chunk_text(text):
+                for key, instruction in QUESTIONS.items():
+                    prompts.append(build_prompt(instruction, chunk))
+                    owners.append((doc_index, key))
+
+        results = [dict.fromkeys(QUESTIONS, "") for _ in texts]
+        # Chunks are in document order, so the first useful answer comes from the earliest chunk
+        for (doc_index, key), answer in zip(owners, self.generate(prompts)):
+            if not results[doc_index][key] and answer.lower() not in EMPTY_ANSWERS:
+                results[doc_index][key] = answer
+        return results
+
+    def extract(self, text):
+        return self.extract_many([text])[0]
+
+
+class ExtractionJobs:
+    """
+    Extraction jobs processed by one background worker.
+
+    The worker takes every job that is waiting (up to max_batch documents)
+    and runs them through a single extract_many call, so a reviewer queue
+    shares model batches instead of paying per document.
+
+    Finished jobs are kept for `result_ttl` seconds, and at most `max_finished`
+    of them; older results are evicted so memory stays bounded. Queued and
+    running jobs are never evicted.
+    """
+
+    def __init__(self, extractor, load_text, max_batch=8, result_ttl=3600, max_finished=1000):
+        self.extractor = extractor
+        self.load_text = load_text  # document reference -> text
+        self.max_batch = max_batch
+        self.result_ttl = result_ttl
+        self.max_finished = max_finished
+        self.jobs = {}
+        self._finished = collections.OrderedDict()  # job id -> monotonic finish time, oldest first
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        self._finished_lock = threading.Lock()
+
+    def start(self, preload=False):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, args=(preload,), daemon=True,
+                                                name="document-extraction")
+                self._worker.start()
+
+    def submit(self, documents):
+        """Queue a job for a list of document references; return the job record"""
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "status": "queued",
+            "documents": list(documents),
+            "results": None,
+            "error": None,
+            "created_at": datetime.datetime.now().isoformat(),
+            "finished_at": None,
+        }
+        self.jobs[job_id] = job
+        self.start()
+        self._queue.put(job_id)
+        return job
+
+    def get(self, job_id):
+        self._evict()
+        return self.jobs.get(job_id)
+
+    def _evict(self):
+        cutoff = time.monotonic() - self.result_ttl
+        with self._finished_lock:
+            while self._finished:
+                job_id, finished = next(iter(self._finished.items()))
+                if finished > cutoff and len(self._finished) <= self.max_finished:
+                    break
+                self._finished.popitem(last=False)
+                self.jobs.pop(job_id, None)
+
+    def _run(self, preload):
+        if preload:
+            self.extractor.load()
+        while True:
+            batch = [self.jobs[self._queue.get()]]
+            try:
+                while sum(len(job["documents"]) for job in batch) < self.max_batch:
+                    batch.append(self.jobs[self._queue.get_nowait()])
+            except queue.Empty:
+                pass
+            self._process(batch)
+
+    def _process(self, batch):
+        texts = []
+        loaded = []
+        for job in batch:
+            job["status"] = "running"
+            try:
+                job_texts = [self.load_text(document) for document in job["documents"]]
+                texts.extend(job_texts)
+                loaded.append((job, len(job_texts)))
+            except Exception as e:
+                self._finish(job, error=f"Could not read documents: {e}")
+
+        try:
+            results = self.extractor.extract_many(texts) if texts else []
+        except Exception as e:
+            for job, _ in loaded:
+                self._finish(job, error=f"Extraction failed: {e}")
+            return
+
+        offset = 0
+        for job, count in loaded:
+            job_results = results[offset:offset + count]
+            offset += count
+            self._finish(job, results=dict(zip(job["documents"], job_results)))
+
+    def _finish(self, job, results=None, error=None):
+        job["results"] = results
+        job["error"] = error
+        job["status"] = "failed" if error else "done"
+        job["finished_at"] = datetime.datetime.now().isoformat()
+        with self._finished_lock:
+            self._finished[job["id"]] = time.monotonic()
+        self._evict()
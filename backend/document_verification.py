@@ -0,0 +1,128 @@
+"""
+Background check of uploaded documents against a license's requirements.
+
+A verify_application job takes the application's license type and files from
+its payload (or, for older jobs, the local store), looks up the
+application_requirements of the chosen license in the services catalog,
+extracts text from each uploaded file and assigns every requirement a
+verdict: "satisfied", "uncertain" or "missing", with the best matching file.
+"""
+
+import datetime
+import re
+
+from job_queue import JobReleased
+
+STOPWORDS = {"a", "an", "and", "of", "the", "for", "with", "to", "in", "on", "or", "other", "document", "documents"}
+
+SATISFIED_SCORE = 0.6
+UNCERTAIN_SCORE = 0.3
+
+
+def tokenize(text):
+    """Lower-case word tokens; camelCase form keys like businessPlan are split"""
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text or "")
+    return [t for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in STOPWORDS]
+
+
+def find_requirements(catalog, license_type):
+    """
+    application_requirements for a license_type.
+
+    The client sends either a license name or a category title, so a license
+    name match wins and a category match returns the union of its licenses'
+    requirements.
+    """
+    wanted = (license_type or "").strip().lower()
+    for category in catalog:
+        for lic in category.get("licenses", []):
+            if lic.get("name", "").strip().lower() == wanted or lic.get("id") == license_type:
+                return list(lic.get("application_requirements", []))
+    for category in catalog:
+        if category.get("name", "").strip().lower() == wanted:
+            seen = {}
+            for lic in category.get("licenses", []):
+                for requirement in lic.get("application_requirements", []):
+                    seen.setdefault(requirement, None)
+            return list(seen)
+    return []
+
+
+def verdict_for(score):
+    if score >= SATISFIED_SCORE:
+        return "satisfied"
+    if score >= UNCERTAIN_SCORE:
+        return "uncertain"
+    return "missing"
+
+
+class KeywordClassifier:
+    """Score each document by how many requirement words appear in its label or text"""
+
+    def score(self, requirement, document):
+        wanted = set(tokenize(requirement))
+        if not wanted:
+            return 0.0
+        label = set(tokenize(f"{document['type']} {document['filename']}"))
+        text = document.get("tokens")
+        if text is None:
+            text = document["tokens"] = set(tokenize(document.get("text", "")))
+        label_score = len(wanted & label) / len(wanted)
+        text_score = len(wanted & text) / len(wanted)
+        # Text mentions are weaker evidence than the field the file was uploaded under
+        return max(label_score, 0.8 * text_score)
+
+    def classify(self, requirements, documents):
+        verdicts = []
+        for requirement in requirements:
+            best, best_score = None, 0.0
+            for document in documents:
+                score = self.score(requirement, document)
+                if score > best_score:
+                    best, best_score = document, score
+            verdicts.append({
+                "requirement": requirement,
+                "verdict": verdict_for(best_score),
+                "score": round(best_score, 3),
+                "file": best["filename"] if best and best_score >= UNCERTAIN_SCORE else None,
+                "sha256": best.get("sha256") if best and best_score >= UNCERTAIN_SCORE else None,
+            })
+        return verdicts
+
+
+class DocumentVerifier:
+    """Job handler for "verify_application" jobs"""
+
+    def __init__(self, get_application, get_catalog, load_text, save_result, classifier=None):
+        self.get_application = get_application  # app id -> application dict or None
+        self.get_catalog = get_catalog          # () -> grouped categories
+        self.load_text = load_text              # file entry -> text ("" when not extractable)
+        self.save_result = save_result          # (app id, verification dict) -> None
+        self.classifier = classifier or KeywordClassifier()
+
+    def __call__(self, payload, report_progress):
+        app_id = payload["application_id"]
+        # Jobs carry a snapshot of what they need, so any process sharing the queue can run them
+        application = payload.get("application") or self.get_application(app_id)
+        if application is None:
+            raise JobReleased(f"Application {app_id} is not held by this process")
+
+        requirements = find_requirements(self.get_catalog(), application.get("license_type"))
+        files = application.get("files", [])
+        documents = []
+        for index, entry in enumerate(files):
+            documents.append({**entry, "text": self.load_text(entry)})
+            report_progress(0.8 * (index + 1) / max(len(files), 1), f"Read {entry.get('filename')}")
+
+        verdicts = self.classifier.classify(requirements, documents)
+        report_progress(0.9, "Classified documents")
+
+        verification = {
+            "status": "complete",
+            "license_type": application.get("license_type"),
+            "requirements": verdicts,
+            "all_satisfied": bool(verdicts) and all(v["verdict"] == "satisfied" for v in verdicts),
+            "checked_at": datetime.datetime.now().isoformat(),
+        }
+        self.save_result(app_id, verification)
+        return verification
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Export google/flan-t5-small to ONNX for the "onnx" extraction backend,
+optionally with dynamic int8 quantization.
+
+Requires: pip install "optimum[onnxruntime]"
+
+Usage:
+    python export_onnx.py --out models/flan-t5-small-onnx
+    python export_onnx.py --out models/flan-t5-small-onnx-int8 --quantize
+
+Then run the API with EXTRACTION_BACKEND=onnx EXTRACTION_MODEL=<out dir>.
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+
+from document_extraction import MODEL_NAME
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the extraction model to ONNX")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--quantize", action="store_true", help="apply dynamic int8 quantization")
+    args = parser.parse_args()
+
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    export_dir = tempfile.mkdtemp() if args.quantize else args.out
+    print(f"Exporting {args.model} to ONNX...")
+    model = ORTModelForSeq2SeqLM.from_pretrained(args.model, export=True)
+    model.save_pretrained(export_dir)
+    AutoTokenizer.from_pretrained(args.model).save_pretrained(args.out)
+
+    if args.quantize:
+        print("Quantizing encoder and decoder to int8...")
+        config = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+        os.makedirs(args.out, exist_ok=True)
+        for name in os.listdir(export_dir):
+            if name.endswith(".onnx"):
+                quantizer = ORTQuantizer.from_pretrained(export_dir, file_name=name)
+                quantizer.quantize(save_dir=args.out, quantization_config=config)
+                # Keep the original file names so ORTModelForSeq2SeqLM finds them
+                quantized = os.path.join(args.out, name.replace(".onnx", "_quantized.onnx"))
+                if os.path.exists(quantized):
+                    os.replace(quantized, os.path.join(args.out, name))
+            elif not os.path.exists(os.path.join(args.out, name)):
+                shutil.copy(os.path.join(export_dir, name), args.out)
+        shutil.rmtree(export_dir, ignore_errors=True)
+
+    print(f"✅ Saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
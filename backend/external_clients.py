@@ -0,0 +1,70 @@
+"""
+Lazily initialized Firebase and Stripe clients.
+
+Importing firebase_admin and stripe and opening the Firestore channel are the
+slowest parts of starting the API, so they happen on first use instead of at
+import time. That keeps cold starts and /health fast and, under gunicorn, lets
+each forked worker open its own gRPC channel.
+
+Stripe calls go through the shared keep-alive session from outbound_http.
+STRIPE_BASE_URL points the SDK at another API base, e.g. mock_provider.py.
+"""
+
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_db = None
+_db_initialized = False
+_stripe = None
+
+
+def get_db():
+    """Firestore client, or None when credentials are missing or invalid"""
+    global _db, _db_initialized
+    if _db_initialized:
+        return _db
+    with _lock:
+        if _db_initialized:
+            return _db
+        # Try to initialize Firebase, but continue without it if it fails
+        try:
+            google_credentials = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+            if google_credentials and os.path.isfile(google_credentials):
+                from firebase_admin import credentials, firestore, initialize_app
+
+                initialize_app(credentials.Certificate(google_credentials))
+                _db = firestore.client()
+                logger.info("Firebase initialized successfully")
+            else:
+                logger.warning("Firebase credentials not found, using mock data")
+        except Exception as e:
+            logger.error("Firebase initialization failed: %s", e)
+            _db = None
+        _db_initialized = True
+        return _db
+
+
+def get_stripe():
+    """The stripe module with the API key configured"""
+    global _stripe
+    if _stripe is None:
+        with _lock:
+            if _stripe is None:
+                import stripe
+
+                from outbound_http import get_client
+
+                stripe.api_key = os.getenv("STRIPE_SECRET_KEY", "sk_test_51234567890")  # Use test key by default
+                # Pooled keep-alive session and our timeouts; the SDK retries with
+                # jitter and reuses the request's idempotency key on every attempt
+                client = get_client("stripe")
+                stripe.default_http_client = stripe.RequestsClient(timeout=client.timeout, session=client.session)
+                stripe.max_network_retries = client.max_retries
+                if client.base_url:
+                    stripe.api_base = client.base_url
+                _stripe = stripe
+    return _stripe
@@ -0,0 +1,109 @@
+"""
+Content-addressed storage for uploaded documents.
+
+Uploads are copied in fixed-size chunks from the request stream to a temporary
+file while their SHA-256 and size are computed, then moved to a path derived
+from the hash. Identical documents are stored once and no upload is held
+in memory as a whole.
+
+Backends implement StorageBackend; LocalFileStorage is the default and an
+object-store backend (S3/GCS/MinIO) only has to provide the same methods.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+
+from tracing import start_span
+
+CHUNK_SIZE = 64 * 1024
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class StoredFile:
+    """Result of storing an upload"""
+
+    __slots__ = ("sha256", "size", "created")
+
+    def __init__(self, sha256, size, created):
+        self.sha256 = sha256
+        self.size = size
+        self.created = created  # False when the content was already stored
+
+
+class StorageBackend:
+    """Interface for content-addressed blob stores"""
+
+    def put_stream(self, stream, chunk_size=CHUNK_SIZE):
+        """Store a readable binary stream; return StoredFile"""
+        raise NotImplementedError
+
+    def exists(self, digest):
+        raise NotImplementedError
+
+    def open(self, digest):
+        """Open stored content for reading (binary file object)"""
+        raise NotImplementedError
+
+    def path_for(self, digest):
+        """Local filesystem path, or None for remote backends"""
+        return None
+
+
+class LocalFileStorage(StorageBackend):
+    """Blobs stored on disk under <root>/<aa>/<bb>/<sha256>"""
+
+    def __init__(self, root):
+        self.root = root
+        self.tmp_dir = os.path.join(root, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def path_for(self, digest):
+        if not DIGEST_RE.match(digest):
+            raise ValueError("Invalid content digest")
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def put_stream(self, stream, chunk_size=CHUNK_SIZE):
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with start_span("file_storage.put", attributes={"storage.backend": "local"}) as span:
+                with os.fdopen(fd, "wb") as out:
+                    while True:
+                        chunk = stream.read(chunk_size)
+                        if not chunk:
+                            break
+                        hasher.update(chunk)
+                        out.write(chunk)
+                        size += len(chunk)
+                stored = self._commit(tmp_path, hasher.hexdigest(), size)
+                span.set_attribute("file.size", size)
+                return stored
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _commit(self, tmp_path, digest, size):
+        final_path = self.path_for(digest)
+        if os.path.exists(final_path):
+            return StoredFile(digest, size, created=False)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(tmp_path, final_path)
+        return StoredFile(digest, size, created=True)
+
+    def exists(self, digest):
+        return bool(DIGEST_RE.match(digest)) and os.path.exists(self.path_for(digest))
+
+    def open(self, digest):
+        return open(self.path_for(digest), "rb")
+
+
+def create_storage():
+    """Build the storage backend selected by FILE_STORAGE_BACKEND"""
+    backend = os.getenv("FILE_STORAGE_BACKEND", "local")
+    if backend == "local":
+        root = os.getenv("FILE_STORAGE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads"))
+        return LocalFileStorage(root)
+    raise ValueError(f"Unknown FILE_STORAGE_BACKEND: {backend}")
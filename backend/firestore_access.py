@@ -0,0 +1,154 @@
+"""
+Shared access path for Firestore calls: deadlines and per-collection circuit breakers.
+
+Every call gets a deadline for its operation type, passed to the client
+library as `timeout=`, so a slow region cannot pin a worker. Each collection
+has its own breaker. When Firestore keeps failing for a collection, calls fail
+fast with FirestoreUnavailable and the endpoint serves its cache or a 503.
+After `reset_timeout` one half-open probe is let through.
+
+Only transient failures count against the breaker: server errors (deadlines,
+unavailability), throttling and transport errors. Everything else, from
+AlreadyExists to the ValueError for a malformed document path, is re-raised
+without touching the breaker, so bad input cannot open a circuit.
+
+Environment:
+    FIRESTORE_TIMEOUT_GET / _SET / _STREAM / _COMMIT   seconds (defaults 2 / 3 / 5 / 5)
+    FIRESTORE_BREAKER_FAILURES    consecutive failures that open a breaker (default 5)
+    FIRESTORE_BREAKER_RESET       seconds before a half-open probe (default 30)
+"""
+
+import logging
+import os
+import threading
+
+import metrics
+from circuit_breaker import CircuitBreaker, OPEN
+from metrics import track_outbound
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEADLINES = {"get": 2.0, "set": 3.0, "stream": 5.0, "commit": 5.0}
+
+circuit_transitions = metrics.REGISTRY.register(metrics.Counter(
+    "firestore_circuit_transitions_total", "Firestore circuit breaker state changes", ("collection", "state")))
+circuit_rejections = metrics.REGISTRY.register(metrics.Counter(
+    "firestore_circuit_rejections_total", "Firestore calls skipped because the circuit was open", ("collection",)))
+
+
+class FirestoreUnavailable(Exception):
+    """Firestore is down, slow or not configured for this collection; serve a fallback"""
+
+    def __init__(self, collection, retry_after=1, cause=None):
+        super().__init__(f"Firestore unavailable for {collection}" + (f": {cause}" if cause else ""))
+        self.collection = collection
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+def is_transient(e):
+    """
+    True only for failures that say something about Firestore's health.
+
+    Server errors (5xx, including deadlines and unavailability), throttling,
+    exhausted client retries and transport/connection errors count. Anything
+    else, such as a ClientError, the ValueError raised for a bad document path
+    or a programming error, is the request's fault and leaves the breaker alone.
+    """
+    if isinstance(e, (ConnectionError, TimeoutError)):
+        return True
+    try:
+        from google.api_core import exceptions as api_exceptions
+    except ImportError:
+        return False
+    from google.auth.exceptions import TransportError
+
+    if isinstance(e, (api_exceptions.ServerError, api_exceptions.TooManyRequests,
+                      api_exceptions.RetryError, TransportError)):
+        return True
+    try:
+        import grpc
+    except ImportError:
+        return False
+    # Raw gRPC errors that escaped the api_core wrappers
+    return isinstance(e, grpc.RpcError) and callable(getattr(e, "code", None)) and e.code() in (
+        grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED,
+        grpc.StatusCode.RESOURCE_EXHAUSTED, grpc.StatusCode.INTERNAL)
+
+
+class FirestoreAccess:
+    def __init__(self, get_db, deadlines=None, failure_threshold=5, reset_timeout=30):
+        self.get_db = get_db
+        self.deadlines = {**DEFAULT_DEADLINES, **(deadlines or {})}
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, get_db):
+        deadlines = {op: float(os.getenv(f"FIRESTORE_TIMEOUT_{op.upper()}", default))
+                     for op, default in DEFAULT_DEADLINES.items()}
+        return cls(get_db, deadlines,
+                   failure_threshold=int(os.getenv("FIRESTORE_BREAKER_FAILURES", "5")),
+                   reset_timeout=float(os.getenv("FIRESTORE_BREAKER_RESET", "30")))
+
+    def breaker(self, collection):
+        """The circuit breaker for a collection, shared by every caller in this process"""
+        breaker = self._breakers.get(collection)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(collection, CircuitBreaker(
+                    collection, self.failure_threshold, self.reset_timeout, on_state_change=self._on_state_change))
+        return breaker
+
+    def _on_state_change(self, collection, previous, state):
+        circuit_transitions.inc(collection, state)
+        if state == OPEN:
+            logger.warning("Firestore circuit for %s opened", collection)
+        else:
+            logger.info("Firestore circuit for %s is %s", collection, state)
+
+    def deadline(self, operation):
+        return self.deadlines.get(operation, self.deadlines["get"])
+
+    def run(self, collection, operation, fn):
+        """
+        Call fn(db, timeout) for one Firestore operation on a collection.
+
+        Raises FirestoreUnavailable when there is no client, the breaker is
+        open, or the call fails transiently. Other errors propagate unchanged.
+        """
+        db = self.get_db()
+        if db is None:
+            raise FirestoreUnavailable(collection, cause="not configured")
+        breaker = self.breaker(collection)
+        if not breaker.allow():
+            circuit_rejections.inc(collection)
+            raise FirestoreUnavailable(collection, breaker.retry_after())
+        try:
+            with track_outbound("firestore", f"{collection}.{operation}"):
+                result = fn(db, self.deadline(operation))
+        except Exception as e:
+            if not is_transient(e):
+                breaker.release()  # the request was at fault, not Firestore
+                raise
+            breaker.record_failure()
+            raise FirestoreUnavailable(collection, breaker.retry_after(), cause=e) from e
+        breaker.record_success()
+        return result
+
+    # ─── Common operations ─────────────────────────────────────────────────
+
+    def get(self, collection, doc_id):
+        """Document dict, or None if it does not exist"""
+        snapshot = self.run(collection, "get", lambda db, t: db.collection(collection).document(doc_id).get(timeout=t))
+        return snapshot.to_dict() if snapshot.exists else None
+
+    def set(self, collection, doc_id, data, merge=False):
+        self.run(collection, "set", lambda db, t: db.collection(collection).document(doc_id).set(data, merge=merge, timeout=t))
+
+    def stream(self, collection):
+        """Every document as (id, dict), read within the stream deadline"""
+        return self.run(collection, "stream", lambda db, t: [
+            (doc.id, doc.to_dict() or {}) for doc in db.collection(collection).stream(timeout=t)
+        ])
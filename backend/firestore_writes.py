@@ -0,0 +1,126 @@
+"""
+Firestore write paths for application submission.
+
+commit_submission() writes the application and the applicant's client profile
+in one WriteBatch: a single round-trip that commits both documents or neither.
+
+WriteBehind is for updates that may lag a little, such as profile fields or
+verification progress. Calls return at once. A background thread merges
+pending updates to the same document and commits them in batches.
+"""
+
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Firestore rejects batches with more than 500 writes
+MAX_BATCH_WRITES = 500
+
+
+def commit_submission(access, app_id, app_data, applicant_email, client_profile=None):
+    """Atomically write applications/{app_id} and, if given, merge clients/{email}"""
+    def commit(db, timeout):
+        batch = db.batch()
+        batch.set(db.collection('applications').document(app_id), app_data)
+        if client_profile is not None:
+            batch.set(db.collection('clients').document(applicant_email), client_profile, merge=True)
+        batch.commit(timeout=timeout)
+
+    access.run('applications', "commit", commit)
+
+
+class WriteBehind:
+    """Buffers merge-writes and commits them from a background thread"""
+
+    def __init__(self, access, flush_interval=1.0, max_pending=10000, max_retry_delay=30):
+        self.access = access
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retry_delay = max_retry_delay
+        self.dropped = 0
+        self._pending = {}  # (collection, doc_id) -> merged fields
+        self._cond = threading.Condition()
+        self._pid = None
+
+    def _ensure_thread(self):
+        # Threads do not survive fork, so each gunicorn worker starts its own
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, daemon=True).start()
+
+    def update(self, collection, doc_id, fields):
+        """Queue a merge of fields into collection/doc_id; later calls win per field"""
+        with self._cond:
+            self._ensure_thread()
+            key = (collection, doc_id)
+            if key not in self._pending and len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                logger.warning("Write-behind buffer full, dropping update to %s/%s", collection, doc_id)
+                return
+            self._pending.setdefault(key, {}).update(fields)
+            self._cond.notify()
+
+    def pending(self):
+        with self._cond:
+            return len(self._pending)
+
+    def flush(self):
+        """Commit everything queued so far on the calling thread"""
+        with self._cond:
+            pending, self._pending = self._pending, {}
+        if pending:
+            self._commit(pending)
+
+    def _commit(self, pending):
+        if self.access.get_db() is None:
+            return
+        # One batch per collection so each is guarded by its own circuit breaker
+        by_collection = {}
+        for (collection, doc_id), fields in pending.items():
+            by_collection.setdefault(collection, []).append((doc_id, fields))
+        committed = set()
+        try:
+            for collection, items in by_collection.items():
+                for start in range(0, len(items), MAX_BATCH_WRITES):
+                    chunk = items[start:start + MAX_BATCH_WRITES]
+                    self.access.run(collection, "commit", lambda db, timeout: self._commit_batch(db, collection, chunk, timeout))
+                    committed.update((collection, doc_id) for doc_id, _ in chunk)
+        except Exception:
+            # Only what was not committed is retried
+            for key in committed:
+                pending.pop(key, None)
+            raise
+
+    @staticmethod
+    def _commit_batch(db, collection, items, timeout):
+        batch = db.batch()
+        for doc_id, fields in items:
+            batch.set(db.collection(collection).document(doc_id), fields, merge=True)
+        batch.commit(timeout=timeout)
+
+    def _requeue(self, pending):
+        # Newer updates queued during the failed commit take precedence
+        with self._cond:
+            for key, fields in pending.items():
+                self._pending[key] = {**fields, **self._pending.get(key, {})}
+
+    def _run(self):
+        delay = self.flush_interval
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            # Let more updates arrive and coalesce before committing
+            time.sleep(delay)
+            with self._cond:
+                pending, self._pending = self._pending, {}
+            try:
+                self._commit(pending)
+                delay = self.flush_interval
+            except Exception as e:
+                logger.warning("Write-behind commit of %d documents failed, retrying: %s", len(pending), e)
+                self._requeue(pending)
+                delay = min(delay * 2, self.max_retry_delay)
@@ -0,0 +1,55 @@
+"""
+Gunicorn settings for the LicenseEase API.
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+Every value can be overridden from the environment (see backend/README.md).
+Workers are threaded (gthread): request handlers mostly wait on Firestore,
+Stripe and disk, so threads give concurrency without one process per request.
+"""
+
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5002')}"
+
+# Processes × threads = concurrent requests. Applications and companies (and,
+# unless USER_STORE=firestore, users) live in process memory, so each worker
+# would hold its own copy: an application submitted through one worker 404s on
+# another, and a payment webhook landing elsewhere never marks it paid. Run one
+# process and scale with threads until those stores are shared.
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+if workers > 1:
+    raise RuntimeError(
+        f"WEB_CONCURRENCY={workers} would split the in-memory application and company stores "
+        "across processes; use 1 worker and scale GUNICORN_THREADS instead"
+    )
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+
+# Import the app once in the master and fork it into the workers. Safe because
+# the Firestore gRPC channel is only opened on first use, inside each worker.
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+# Recycling a worker discards everything held in its memory, including
+# applications, so it is off by default; only enable it once state is external
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200")) if max_requests else 0
+
+# Graceful restarts: workers get this long to finish in-flight requests on HUP/TERM
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+
+# Keep-alive should exceed the idle timeout of the load balancer in front (often 60s)
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "75"))
+backlog = int(os.getenv("GUNICORN_BACKLOG", "2048"))
+
+accesslog = os.getenv("GUNICORN_ACCESSLOG", "-")
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
+
+
+def post_fork(server, worker):
+    # Catalog listener, log listener and job worker threads must be started inside each worker process
+    from app import start_background_workers
+
+    start_background_workers()
@@ -0,0 +1,87 @@
+"""
+Pre-serialized JSON responses with ETag revalidation.
+
+Large, rarely changing payloads (the services catalog) are serialized once,
+compressed once per encoding and answered with 304 when the client already
+holds the same content hash.
+"""
+
+import gzip
+import hashlib
+import json
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+
+def serialize(data):
+    """Compact, key-sorted JSON bytes so equal content always hashes the same"""
+    return json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def content_hash(body):
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+class PreparedJSON:
+    """Serialized JSON body plus its compressed variants, keyed by content hash"""
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = content_hash(body)
+        self.variants = {
+            'identity': self.body,
+            'gzip': gzip.compress(self.body, compresslevel=9, mtime=0),
+        }
+        if brotli is not None:
+            self.variants['br'] = brotli.compress(self.body, quality=11)
+
+    def pick_encoding(self, accept_encodings):
+        """Smallest variant the client accepts"""
+        best = 'identity'
+        for encoding, payload in self.variants.items():
+            if encoding != 'identity' and accept_encodings[encoding] > 0:
+                if len(payload) < len(self.variants[best]):
+                    best = encoding
+        return best
+
+    def to_response(self, request, headers=None):
+        """Build a 200 or 304 response for the current request"""
+        common = {
+            'ETag': f'"{self.etag}"',
+            'Vary': 'Accept-Encoding',
+            'Cache-Control': 'public, no-cache',
+            **(headers or {}),
+        }
+
+        if request.if_none_match.contains_weak(self.etag):
+            return Response(status=304, headers=common)
+
+        encoding = self.pick_encoding(request.accept_encodings)
+        response = Response(self.variants[encoding], status=200, mimetype='application/json', headers=common)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+
+class PreparedJSONCache:
+    """Reuse PreparedJSON objects for identical content across version bumps"""
+
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self._by_hash = {}
+
+    def get(self, data):
+        body = serialize(data)
+        key = content_hash(body)
+        prepared = self._by_hash.get(key)
+        if prepared is None:
+            prepared = PreparedJSON(body)
+            if len(self._by_hash) >= self.max_entries:
+                self._by_hash.pop(next(iter(self._by_hash)))
+            self._by_hash[key] = prepared
+        return prepared
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Import-time report for the API, based on `python -X importtime`.
+
+Imports `app` (and builds it with create_app()) in a fresh interpreter,
+prints the slowest modules by cumulative import time, and fails when the
+total goes over a budget or when a module that should load lazily
+(Stripe, Firebase, the ML stack, ...) was imported at startup.
+
+It then runs gunicorn.conf.py's post_fork hook the way a worker does after
+fork. The check fails if the hook goes over its own budget or calls get_db()
+on the worker's main thread, since either would delay the worker's first
+/health.
+
+Usage:
+    python import_time_report.py
+    python import_time_report.py --budget-ms 400 --top 25 --post-fork-budget-ms 50
+
+Run it in CI to catch cold-start regressions; exits non-zero on failure.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Only needed by some requests; importing any of these at startup is a regression
+LAZY_MODULES = (
+    "stripe",
+    "firebase_admin",
+    "google.cloud.firestore",
+    "requests",
+    "transformers",
+    "torch",
+    "onnxruntime",
+    "fitz",
+)
+
+STARTUP_CODE = "from app import create_app; create_app(start_workers=False)"
+
+# Preloaded master, then the worker's post_fork hook; prints a JSON line
+POST_FORK_CODE = """
+import json, runpy, threading, time
+import app
+app.create_app(start_workers=False)
+main_thread_get_db = []
+get_db = app.get_db
+def traced_get_db():
+    if threading.current_thread() is threading.main_thread():
+        main_thread_get_db.append(True)
+    return get_db()
+app.get_db = traced_get_db
+post_fork = runpy.run_path("gunicorn.conf.py")["post_fork"]
+started = time.perf_counter()
+post_fork(None, None)
+print(json.dumps({"ms": (time.perf_counter() - started) * 1000, "get_db_on_main_thread": bool(main_thread_get_db)}))
+"""
+
+
+def run(code, *flags):
+    env = {**os.environ, "VERIFICATION_WORKERS": "0", "PYTHONDONTWRITEBYTECODE": "1"}
+    result = subprocess.run([sys.executable, *flags, "-c", code],
+                            cwd=HERE, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "import failed")
+    return result
+
+
+def measure(code):
+    """Run code under -X importtime; return [(module, self_us, cumulative_us)]"""
+    result = run(code, "-X", "importtime")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # Nested imports are indented by two spaces per level after the separator
+        rows.append((name[1:].rstrip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report and check API import time")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "500")))
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--post-fork-budget-ms", type=float, default=float(os.getenv("POST_FORK_BUDGET_MS", "100")))
+    args = parser.parse_args()
+
+    rows = measure(STARTUP_CODE)
+    # Top-level imports are the ones with no leading indentation in the module column
+    top_level = [row for row in rows if not row[0].startswith(" ")]
+    total_ms = sum(cumulative for _, _, cumulative in top_level) / 1000
+
+    print(f"{'module':<48}{'self ms':>10}{'cumul ms':>10}")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: row[2], reverse=True)[:args.top]:
+        print(f"{name.strip():<48}{self_us / 1000:>10.1f}{cumulative_us / 1000:>10.1f}")
+    print(f"\nTotal import time: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+
+    imported = {name.strip() for name, _, _ in rows}
+    eager = [module for module in LAZY_MODULES if module in imported]
+
+    failed = False
+    if eager:
+        print(f"❌ Imported at startup but should be lazy: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"❌ Import time over budget by {total_ms - args.budget_ms:.0f} ms")
+        failed = True
+
+    post_fork = json.loads(run(POST_FORK_CODE).stdout.strip().splitlines()[-1])
+    print(f"post_fork hook: {post_fork['ms']:.0f} ms (budget {args.post_fork_budget_ms:.0f} ms)")
+    if post_fork["get_db_on_main_thread"]:
+        print("❌ post_fork initializes Firebase on the worker's main thread")
+        failed = True
+    if post_fork["ms"] > args.post_fork_budget_ms:
+        print(f"❌ post_fork over budget by {post_fork['ms'] - args.post_fork_budget_ms:.0f} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("✅ Import time within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Durable background job queue and worker pool.
+
+JobQueue is the interface workers and endpoints use. SQLiteJobQueue is the
+local implementation: one row per job, claimed under BEGIN IMMEDIATE so several
+worker threads (or processes sharing the file) never take the same job. A
+claimed job holds a lease; if its worker dies the job becomes claimable again
+once the lease expires. A Redis-backed queue only has to provide the same
+methods.
+
+The file may be shared by several processes, so a handler can be handed a job
+that only another process can run. It raises JobReleased and the job goes back
+to the queue without using up an attempt.
+"""
+
+import contextlib
+import datetime
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+from logging_setup import request_id_var
+
+logger = logging.getLogger(__name__)
+
+
+def _now():
+    return datetime.datetime.now().isoformat()
+
+
+class JobReleased(Exception):
+    """Raised by a handler that cannot run this job here; it is requeued after `delay` seconds"""
+
+    def __init__(self, message, delay=5.0):
+        super().__init__(message)
+        self.delay = delay
+
+
+class JobQueue:
+    """Interface for job queues"""
+
+    def enqueue(self, kind, payload):
+        """Add a job; return its id"""
+        raise NotImplementedError
+
+    def claim(self, worker_id, kinds):
+        """Take the oldest runnable job of one of these kinds, or None"""
+        raise NotImplementedError
+
+    def progress(self, job_id, progress, message=None):
+        raise NotImplementedError
+
+    def complete(self, job_id, result):
+        raise NotImplementedError
+
+    def fail(self, job_id, error):
+        """Record a failure; the job is retried with backoff until max_attempts"""
+        raise NotImplementedError
+
+    def release(self, job_id, delay, reason=None):
+        """Give a claimed job back without counting the attempt"""
+        raise NotImplementedError
+
+    def get(self, job_id):
+        """Job record as a dict, or None"""
+        raise NotImplementedError
+
+
+class SQLiteJobQueue(JobQueue):
+    def __init__(self, path, lease_seconds=300, max_attempts=3, max_releases=20, retry_delay=5.0, max_retry_delay=300.0):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.max_releases = max_releases
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    message TEXT,
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    claimed_by TEXT,
+                    lease_expires REAL,
+                    releases INTEGER NOT NULL DEFAULT 0,
+                    run_after REAL NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            # Files created before these columns existed
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column in ("releases INTEGER NOT NULL DEFAULT 0", "run_after REAL NOT NULL DEFAULT 0"):
+                if column.split()[0] not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column}")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_runnable ON jobs (status, created_at)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextlib.contextmanager
+    def _connection(self):
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, kind, payload):
+        job_id = uuid.uuid4().hex
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, created_at, updated_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, kind, json.dumps(payload), _now(), _now()),
+            )
+        return job_id
+
+    def claim(self, worker_id, kinds):
+        placeholders = ",".join("?" for _ in kinds)
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                f"""SELECT * FROM jobs
+                    WHERE kind IN ({placeholders})
+                        AND ((status = 'queued' AND run_after <= ?) OR (status = 'running' AND lease_expires < ?))
+                    ORDER BY created_at LIMIT 1""",
+                (*kinds, time.time(), time.time()),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                """UPDATE jobs SET status = 'running', claimed_by = ?, lease_expires = ?,
+                       attempts = attempts + 1, updated_at = ? WHERE id = ?""",
+                (worker_id, time.time() + self.lease_seconds, _now(), row["id"]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return self.get(row["id"])
+
+    def _update(self, job_id, **fields):
+        fields["updated_at"] = _now()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connection() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def progress(self, job_id, progress, message=None):
+        self._update(job_id, progress=progress, message=message, lease_expires=time.time() + self.lease_seconds)
+
+    def complete(self, job_id, result):
+        self._update(job_id, status="done", progress=1.0, result=json.dumps(result), lease_expires=None)
+
+    def retry_delay_for(self, attempts):
+        """Exponential delay before the next attempt, jittered so failed jobs don't retry in lockstep"""
+        delay = min(self.max_retry_delay, self.retry_delay * 2 ** max(attempts - 1, 0))
+        return delay * random.uniform(0.5, 1.0)
+
+    def fail(self, job_id, error):
+        job = self.get(job_id)
+        if job and job["attempts"] >= self.max_attempts:
+            self._update(job_id, status="failed", error=str(error), lease_expires=None)
+            return
+        # Without a delay the same worker would re-claim the job at once and
+        # use up every attempt within milliseconds
+        attempts = job["attempts"] if job else 1
+        self._update(job_id, status="queued", error=str(error), lease_expires=None,
+                     run_after=time.time() + self.retry_delay_for(attempts))
+
+    def release(self, job_id, delay, reason=None):
+        job = self.get(job_id)
+        if job and job["releases"] >= self.max_releases:
+            # Nobody has been able to run it for a long time; stop passing it around
+            self._update(job_id, status="failed", error=reason or "released too many times", lease_expires=None)
+            return
+        with self._connection() as conn:
+            conn.execute(
+                """UPDATE jobs SET status = 'queued', attempts = MAX(attempts - 1, 0), releases = releases + 1,
+                       claimed_by = NULL, lease_expires = NULL, run_after = ?, updated_at = ? WHERE id = ?""",
+                (time.time() + delay, _now(), job_id),
+            )
+
+    def get(self, job_id):
+        with self._connection() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+
+class WorkerPool:
+    """Threads that claim jobs and dispatch them to handlers by kind"""
+
+    def __init__(self, queue, handlers, workers=2, poll_interval=1.0):
+        self.queue = queue
+        self.handlers = handlers  # kind -> fn(payload, report_progress) -> result
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._threads = []
+        self._stop = threading.Event()
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, args=(f"worker-{uuid.uuid4().hex[:6]}-{i}",),
+                                      daemon=True, name=f"job-worker-{i}")
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, worker_id):
+        kinds = list(self.handlers)
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim(worker_id, kinds)
+            except Exception as e:
+                logger.warning("Job queue claim failed: %s", e)
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            self._execute(job)
+
+    def _execute(self, job):
+        job_id = job["id"]
+
+        def report_progress(progress, message=None):
+            self.queue.progress(job_id, progress, message)
+
+        # Log lines from the job carry the ID of the request that enqueued it
+        payload = job["payload"]
+        token = request_id_var.set((payload.get("request_id") if isinstance(payload, dict) else None) or f"job-{job_id}")
+        try:
+            result = self.handlers[job["kind"]](payload, report_progress)
+            self.queue.complete(job_id, result)
+        except JobReleased as e:
+            logger.info("Job %s (%s) released: %s", job_id, job["kind"], e)
+            self.queue.release(job_id, e.delay, str(e))
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job_id, job["kind"])
+            self.queue.fail(job_id, e)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Small HTTP load generator for comparing serving modes locally.
+
+Each client thread keeps one keep-alive connection and sends requests
+back to back for the given duration. Reports requests/s, error count and
+latency percentiles.
+
+Usage:
+    # against a server that is already running
+    python load_test.py --url http://127.0.0.1:5002 --path /services --concurrency 32 --duration 15
+
+    # start the dev server and gunicorn in turn and compare them
+    python load_test.py --compare --path /services
+"""
+
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def client(host, port, path, deadline, latencies, errors, lock):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    local = []
+    failed = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            conn.request("GET", path, headers={"Accept-Encoding": "gzip"})
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                failed += 1
+            if response.getheader("Connection", "").lower() == "close":
+                conn.close()
+        except (OSError, http.client.HTTPException):
+            failed += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+            continue
+        local.append(time.perf_counter() - started)
+    conn.close()
+    with lock:
+        latencies.extend(local)
+        errors[0] += failed
+
+
+def run_load(url, path, concurrency, duration):
+    parsed = urlparse(url)
+    latencies, errors, lock = [], [0], threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=client, args=(parsed.hostname, parsed.port or 80, path, deadline, latencies, errors, lock))
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    if not latencies:
+        return {"requests": 0, "errors": errors[0], "rps": 0.0, "p50_ms": 0.0, "p99_ms": 0.0}
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            conn.getresponse().read()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def serving_mode(name, port):
+    """Command and extra environment to start one serving mode on a port"""
+    if name == "flask dev server":
+        return [sys.executable, "-c",
+                f"from app import create_app; create_app().run(port={port}, host='127.0.0.1', threaded=True)"], {}
+    return ([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:application"],
+            {"PORT": str(port), "HOST": "127.0.0.1", "GUNICORN_ACCESSLOG": "/dev/null"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load test")
+    parser.add_argument("--url", default="http://127.0.0.1:5002")
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--compare", action="store_true", help="start dev server and gunicorn and compare")
+    args = parser.parse_args()
+
+    if not args.compare:
+        result = run_load(args.url, args.path, args.concurrency, args.duration)
+        print(f"{result['requests']} requests, {result['errors']} errors, {result['rps']:.0f} req/s, "
+              f"p50 {result['p50_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms")
+        return
+
+    rows = []
+    for name in ("flask dev server", "gunicorn"):
+        port = free_port()
+        command, env = serving_mode(name, port)
+        print(f"Starting {name} on port {port}...")
+        process = subprocess.Popen(command, cwd=HERE, env={**os.environ, "VERIFICATION_WORKERS": "0", **env},
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            if not wait_for(port):
+                print(f"❌ {name} did not start")
+                continue
+            time.sleep(2)  # let every gunicorn worker finish booting
+            rows.append((name, run_load(f"http://127.0.0.1:{port}", args.path, args.concurrency, args.duration)))
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    print(f"\n{'server':<18}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for name, result in rows:
+        print(f"{name:<18}{result['rps']:>9.0f}{result['p50_ms']:>9.1f}{result['p99_ms']:>9.1f}{result['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
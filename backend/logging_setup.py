@@ -0,0 +1,163 @@
+"""
+Structured, non-blocking logging for the API.
+
+Request threads only put records on an in-memory queue; a single listener
+thread turns them into JSON lines on stdout. Every record carries the current
+request ID. Levels are set per module, and DEBUG records can be sampled so
+high-volume debug lines stay cheap when enabled in production.
+
+Environment:
+    LOG_LEVEL               root level (default INFO)
+    LOG_LEVELS              per-module levels, e.g. "app=DEBUG,job_queue=WARNING"
+    LOG_FORMAT              json (default) or text
+    LOG_DEBUG_SAMPLE_RATE   fraction of DEBUG records kept (default 1.0)
+    LOG_QUEUE_SIZE          records buffered before new ones are dropped (default 10000)
+
+Use %-style arguments (logger.info("saved %s", app_id)) so messages that are
+filtered out are never formatted.
+"""
+
+import atexit
+import contextvars
+import copy
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+
+request_id_var = contextvars.ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+_lock = threading.Lock()
+_state = {"pid": None, "listener": None, "handler": None}
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the request ID of the thread that logged them"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class DebugSampler(logging.Filter):
+    """Keep only a fraction of DEBUG (and lower) records"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or self.rate >= 1 or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request_id and extra= fields"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Merge args and render the traceback here, while they are still valid;
+        # JSON encoding is left to the listener thread.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_levels(spec):
+    """"app=DEBUG,job_queue=WARNING" -> {"app": "DEBUG", "job_queue": "WARNING"}"""
+    levels = {}
+    for item in (spec or "").split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging():
+    """
+    Install the queue handler on the root logger and start the listener.
+
+    Safe to call repeatedly; after a fork (gunicorn workers) it starts a new
+    listener thread in the child, since threads do not survive fork.
+    """
+    with _lock:
+        if _state["pid"] == os.getpid():
+            return _state["handler"]
+
+        root = logging.getLogger()
+        if _state["handler"] is not None:
+            root.removeHandler(_state["handler"])
+
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(TextFormatter() if os.getenv("LOG_FORMAT") == "text" else JsonFormatter())
+
+        log_queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+        handler = NonBlockingQueueHandler(log_queue)
+        handler.addFilter(RequestIdFilter())
+        handler.addFilter(DebugSampler(float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))))
+        listener = logging.handlers.QueueListener(log_queue, stream)
+        listener.start()
+
+        root.addHandler(handler)
+        root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+        for name, level in parse_levels(os.getenv("LOG_LEVELS")).items():
+            logging.getLogger(name).setLevel(level)
+
+        if _state["pid"] is None:
+            atexit.register(shutdown_logging)
+        _state.update(pid=os.getpid(), listener=listener, handler=handler)
+        return handler
+
+
+def shutdown_logging():
+    """Flush queued records; called at exit"""
+    listener = _state.get("listener")
+    if listener is not None and _state["pid"] == os.getpid():
+        listener.stop()
+        _state["listener"] = None
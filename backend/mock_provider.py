@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Local mock of the Stripe and mobile-money APIs for exercising outbound_http.
+
+The server answers POST /v1/payment_intents (Stripe-shaped JSON) and
+POST /requesttopay (mobile money, 202 Accepted). It can fail the first N
+attempts of every idempotency key with 503, or delay responses to trip read
+timeouts. It counts TCP connections, so keep-alive reuse is visible.
+
+Usage:
+    # run a mock and point the API at it
+    python mock_provider.py --port 8099 --fail-first 1
+    STRIPE_BASE_URL=http://127.0.0.1:8099 MOBILE_MONEY_BASE_URL=http://127.0.0.1:8099 python app.py
+
+    # check pooling, retries and timeouts against an in-process mock
+    python mock_provider.py --self-test
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class MockProviderServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fail_first=0, delay=0.0):
+        super().__init__(address, MockProviderHandler)
+        self.fail_first = fail_first
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.attempts = {}  # idempotency key -> attempts seen
+        self.results = {}   # idempotency key -> first successful body
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle_error(self, request, client_address):
+        # Clients that hit their read timeout hang up before the delayed reply
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+    def reset(self, fail_first=0, delay=0.0):
+        with self.lock:
+            self.fail_first, self.delay = fail_first, delay
+            self.connections = self.requests = 0
+            self.attempts.clear()
+            self.results.clear()
+
+
+class MockProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        key = self.headers.get("Idempotency-Key") or self.headers.get("X-Reference-Id") or str(uuid.uuid4())
+        with self.server.lock:
+            self.server.requests += 1
+            attempt = self.server.attempts[key] = self.server.attempts.get(key, 0) + 1
+            fail = attempt <= self.server.fail_first
+            delay = self.server.delay
+        if delay:
+            time.sleep(delay)
+        if fail:
+            return self._reply(503, {"error": "try again"}, {"Retry-After": "0"})
+
+        with self.server.lock:
+            cached = self.server.results.get(key)
+        if cached is not None:
+            return self._reply(*cached)
+        if self.path.startswith("/v1/payment_intents"):
+            params = dict(parse_qsl(body.decode()))
+            intent_id = "pi_" + uuid.uuid5(uuid.NAMESPACE_URL, key).hex[:24]
+            result = (200, {
+                "id": intent_id,
+                "object": "payment_intent",
+                "amount": int(params.get("amount", 0)),
+                "currency": params.get("currency", "usd"),
+                "client_secret": f"{intent_id}_secret_mock",
+                "status": "requires_payment_method",
+            })
+        elif self.path.startswith("/requesttopay"):
+            result = (202, {})
+        else:
+            return self._reply(404, {"error": "not found"})
+        with self.server.lock:
+            self.server.results.setdefault(key, result)
+        self._reply(*result)
+
+    def _reply(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_server(host="127.0.0.1", port=0, fail_first=0, delay=0.0):
+    server = MockProviderServer((host, port), fail_first, delay)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def self_test():
+    sys.path.insert(0, HERE)
+    from outbound_http import ProviderClient, ProviderUnavailable
+
+    server = start_server()
+    client = ProviderClient("mobile_money", base_url=server.url, read_timeout=0.5,
+                            max_retries=2, backoff_initial=0.01, backoff_max=0.05)
+    failures = []
+
+    def check(label, ok, detail=""):
+        print(f"{'✅' if ok else '❌'} {label}" + (f" ({detail})" if detail else ""))
+        if not ok:
+            failures.append(label)
+
+    # Keep-alive: sequential calls share one pooled connection
+    for i in range(20):
+        client.request("POST", "/requesttopay", "request_to_pay", idempotency_key=f"pool-{i}", json={"n": i})
+    check("20 requests over a pooled connection", server.connections == 1,
+          f"{server.connections} connections")
+
+    # Retries with an idempotency key succeed and the provider sees one key
+    server.reset(fail_first=2)
+    response = client.request("POST", "/requesttopay", "request_to_pay", idempotency_key="retry-me", json={})
+    check("POST with Idempotency-Key retried past two 503s",
+          response.status_code == 202 and server.attempts.get("retry-me") == 3,
+          f"status {response.status_code}, {server.attempts.get('retry-me')} attempts")
+
+    # Without a key a POST is not repeated
+    server.reset(fail_first=1)
+    try:
+        client.request("POST", "/requesttopay", "request_to_pay", json={})
+        check("POST without Idempotency-Key not retried", False, "request succeeded")
+    except ProviderUnavailable:
+        check("POST without Idempotency-Key not retried", server.requests == 1, f"{server.requests} attempts")
+
+    # Exhausted retries surface as ProviderUnavailable
+    server.reset(fail_first=10)
+    try:
+        client.request("POST", "/requesttopay", "request_to_pay", idempotency_key="down", json={})
+        check("gives up after max_retries", False, "request succeeded")
+    except ProviderUnavailable as e:
+        check("gives up after max_retries", server.requests == 3 and e.status == 503, f"{server.requests} attempts")
+
+    # Read timeout is enforced per attempt
+    server.reset(delay=1.0)
+    started = time.perf_counter()
+    try:
+        client.request("POST", "/requesttopay", "request_to_pay", json={})
+        check("read timeout enforced", False, "request succeeded")
+    except ProviderUnavailable:
+        elapsed = time.perf_counter() - started
+        check("read timeout enforced", elapsed < 0.9, f"{elapsed:.2f}s")
+
+    # The Stripe SDK on the shared session, retrying under the same idempotency key
+    server.reset(fail_first=1)
+    os.environ["STRIPE_BASE_URL"] = server.url
+    os.environ.setdefault("STRIPE_SECRET_KEY", "sk_test_mock")
+    try:
+        from external_clients import get_stripe
+
+        stripe = get_stripe()
+        stripe.default_http_client._sleep_time_seconds = lambda *args, **kwargs: 0.01
+        intent = stripe.PaymentIntent.create(amount=1000, currency="usd", idempotency_key="intent-1")
+        again = stripe.PaymentIntent.create(amount=1000, currency="usd", idempotency_key="intent-1")
+        check("Stripe SDK retried through the mock and kept the idempotency key",
+              intent.id == again.id and server.attempts.get("intent-1") == 3,
+              f"{server.attempts.get('intent-1')} attempts, {server.connections} connections")
+    except ImportError:
+        print("- stripe not installed, skipping the SDK check")
+
+    server.shutdown()
+    return not failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Stripe / mobile-money provider")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--fail-first", type=int, default=0, help="answer 503 to the first N attempts of each key")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before every response")
+    parser.add_argument("--self-test", action="store_true", help="check outbound_http against an in-process mock")
+    args = parser.parse_args()
+
+    if args.self_test:
+        sys.exit(0 if self_test() else 1)
+
+    server = MockProviderServer((args.host, args.port), args.fail_first, args.delay)
+    print(f"Mock provider on {server.url} (fail first {args.fail_first}, delay {args.delay}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Shared outbound HTTP layer for payment providers (Stripe, mobile money).
+
+Each provider has its own requests.Session with a keep-alive pool, so repeat
+calls reuse TCP and TLS connections. Sessions are created lazily per process,
+because pooled sockets must not be shared across a gunicorn fork.
+
+A request is retried only when repeating it cannot charge a customer twice:
+idempotent methods, or any method that carries an Idempotency-Key. Connect
+timeouts are always safe to retry, since nothing reached the provider.
+Connection errors, 429 and 502/503/504 are retried with full-jitter
+exponential backoff. A Retry-After header is honoured up to the backoff cap.
+
+Environment (PROVIDER is STRIPE or MOBILE_MONEY; per-provider values win):
+    OUTBOUND_CONNECT_TIMEOUT / <PROVIDER>_CONNECT_TIMEOUT   seconds (default 3.05)
+    OUTBOUND_READ_TIMEOUT / <PROVIDER>_READ_TIMEOUT         seconds (default 20)
+    OUTBOUND_MAX_RETRIES / <PROVIDER>_MAX_RETRIES           retries after the first attempt (default 2)
+    OUTBOUND_POOL_SIZE / <PROVIDER>_POOL_SIZE               keep-alive connections per provider (default 10)
+    OUTBOUND_BACKOFF_MAX / <PROVIDER>_BACKOFF_MAX           longest wait between attempts (default 8)
+    <PROVIDER>_BASE_URL                                     provider endpoint, e.g. a local mock server
+    <PROVIDER>_API_KEY                                      sent as a bearer token when set
+"""
+
+import email.utils
+import logging
+import os
+import threading
+import time
+
+import metrics
+from circuit_breaker import Backoff
+from metrics import track_outbound
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+outbound_retries = metrics.REGISTRY.register(metrics.Counter(
+    "outbound_retries_total", "Outbound provider calls retried, by reason", ("service", "operation", "reason")))
+
+
+class ProviderUnavailable(Exception):
+    """The provider kept failing transiently (or refused a non-retryable request); try again later"""
+
+    def __init__(self, provider, status=None, retry_after=None, cause=None):
+        detail = f"HTTP {status}" if status else cause
+        super().__init__(f"{provider} unavailable" + (f": {detail}" if detail else ""))
+        self.provider = provider
+        self.status = status
+        self.retry_after = max(1, int((retry_after or 0) + 0.999))
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ProviderClient:
+    def __init__(self, name, base_url="", connect_timeout=3.05, read_timeout=20.0, max_retries=2,
+                 pool_size=10, backoff_initial=0.25, backoff_max=8.0, headers=None):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.pool_size = pool_size
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.headers = dict(headers or {})
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, name):
+        prefix = name.upper()
+
+        def setting(key, default):
+            return os.getenv(f"{prefix}_{key}", os.getenv(f"OUTBOUND_{key}", default))
+
+        api_key = os.getenv(f"{prefix}_API_KEY")
+        return cls(name,
+                   base_url=os.getenv(f"{prefix}_BASE_URL", ""),
+                   connect_timeout=float(setting("CONNECT_TIMEOUT", "3.05")),
+                   read_timeout=float(setting("READ_TIMEOUT", "20")),
+                   max_retries=int(setting("MAX_RETRIES", "2")),
+                   pool_size=int(setting("POOL_SIZE", "10")),
+                   backoff_max=float(setting("BACKOFF_MAX", "8")),
+                   headers={"Authorization": f"Bearer {api_key}"} if api_key else None)
+
+    @property
+    def timeout(self):
+        """(connect, read) as requests expects it"""
+        return (self.connect_timeout, self.read_timeout)
+
+    @property
+    def session(self):
+        """This process's pooled session, created on first use"""
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    # Retries are ours; the adapter only pools connections
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update(self.headers)
+                    self._session, self._pid = session, os.getpid()
+        return self._session
+
+    def close(self):
+        with self._lock:
+            if self._session is not None and self._pid == os.getpid():
+                self._session.close()
+            self._session = self._pid = None
+
+    def request(self, method, path, operation, idempotency_key=None, **kwargs):
+        """
+        Send one request, retrying transient failures when it is safe to.
+
+        Returns the response for any status outside RETRY_STATUSES. Raises
+        ProviderUnavailable once retries are exhausted or the request may not
+        be retried.
+        """
+        import requests
+
+        method = method.upper()
+        retryable = method in IDEMPOTENT_METHODS or idempotency_key is not None
+        headers = dict(kwargs.pop("headers", None) or {})
+        if idempotency_key is not None:
+            headers.setdefault("Idempotency-Key", idempotency_key)
+        kwargs.setdefault("timeout", self.timeout)
+        url = path if path.startswith(("http://", "https://")) else f"{self.base_url}/{path.lstrip('/')}"
+        backoff = Backoff(self.backoff_initial, self.backoff_max)
+
+        with track_outbound(self.name, operation):
+            attempt = 0
+            while True:
+                retry_after = None
+                try:
+                    response = self.session.request(method, url, headers=headers, **kwargs)
+                except requests.exceptions.ConnectTimeout as e:
+                    reason, safe, failure = "connect_timeout", True, ProviderUnavailable(self.name, cause=e)
+                except requests.exceptions.Timeout as e:
+                    reason, safe, failure = "read_timeout", retryable, ProviderUnavailable(self.name, cause=e)
+                except requests.exceptions.ConnectionError as e:
+                    reason, safe, failure = "connection", retryable, ProviderUnavailable(self.name, cause=e)
+                else:
+                    if response.status_code not in RETRY_STATUSES:
+                        return response
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    response.close()
+                    reason, safe = str(response.status_code), retryable
+                    failure = ProviderUnavailable(self.name, response.status_code, retry_after)
+
+                if not safe or attempt >= self.max_retries:
+                    raise failure
+                delay = backoff.next_delay()
+                if retry_after is not None:
+                    delay = min(max(delay, retry_after), self.backoff_max)
+                attempt += 1
+                outbound_retries.inc(self.name, operation, reason)
+                logger.info("Retrying %s %s (%s), attempt %d in %.2fs", self.name, operation, reason, attempt + 1, delay)
+                time.sleep(delay)
+
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_client(name):
+    """The process-wide client for a provider, configured from the environment on first use"""
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.setdefault(name, ProviderClient.from_env(name))
+    return client
+
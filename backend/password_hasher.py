@@ -0,0 +1,98 @@
+"""
+Password hashing on a bounded worker pool.
+
+scrypt is memory-hard and takes tens of milliseconds per hash, so it runs on a
+small dedicated thread pool (hashlib.scrypt releases the GIL) instead of on the
+request thread. The request thread still waits for its hash, so the number
+of hashes in flight (running plus queued) is capped below the server's request
+threads. Callers beyond the cap get HasherBusy right away and the endpoint
+answers 503, leaving the other threads free for everything else.
+
+Stored format: ``scrypt$<n>$<r>$<p>$<salt b64>$<hash b64>``. Each hash carries
+its own cost parameters, so hashes made with older settings (or the legacy
+unsalted sha256 hex digests) are upgraded on the next successful login.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing pool is saturated"""
+
+    def __init__(self, retry_after=1):
+        super().__init__("Password hashing pool is saturated")
+        self.retry_after = retry_after
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode('ascii')
+
+
+def _unb64(text):
+    return base64.b64decode(text.encode('ascii'))
+
+
+class PasswordHasher:
+    def __init__(self, n=2 ** 14, r=8, p=1, max_workers=2, max_in_flight=4, timeout=10, retry_after=1):
+        self.n = n
+        self.r = r
+        self.p = p
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.max_in_flight = max(1, max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=min(max_workers, self.max_in_flight),
+                                            thread_name_prefix="password-hash")
+        # Running + waiting jobs, each holding a request thread; anything beyond this is rejected
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy(self.retry_after)
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result(timeout=self.timeout)
+
+    @staticmethod
+    def _scrypt(password, salt, n, r, p):
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r * p + 1024 * 1024, dklen=32)
+
+    def _hash(self, password):
+        salt = os.urandom(16)
+        digest = self._scrypt(password, salt, self.n, self.r, self.p)
+        return f"scrypt${self.n}${self.r}${self.p}${_b64(salt)}${_b64(digest)}"
+
+    def _verify(self, password, stored):
+        if stored.startswith("scrypt$"):
+            _, n, r, p, salt, digest = stored.split("$")
+            n, r, p = int(n), int(r), int(p)
+            candidate = self._scrypt(password, _unb64(salt), n, r, p)
+            ok = hmac.compare_digest(candidate, _unb64(digest))
+            return ok, ok and (n, r, p) != (self.n, self.r, self.p)
+
+        # Legacy unsalted sha256 hex digest
+        candidate = hashlib.sha256(password.encode()).hexdigest()
+        ok = hmac.compare_digest(candidate, stored)
+        return ok, ok
+
+    def hash(self, password):
+        """Hash a password with the current cost parameters"""
+        return self._run(self._hash, password)
+
+    def verify(self, password, stored):
+        """Return (matches, needs_rehash) for a stored hash"""
+        if not stored:
+            return False, False
+        return self._run(self._verify, password, stored)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
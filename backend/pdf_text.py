@@ -0,0 +1,117 @@
+"""
+Page-level PDF text extraction with an on-disk cache.
+
+Small PDFs are read page by page in-process. Large ones are split into page
+ranges that a shared process pool extracts in parallel; pages are still
+yielded in order as soon as their range is done. Extracted pages are cached
+on disk keyed by the file's SHA-256 and the PyMuPDF version, so re-opening the
+same business plan costs one file read.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+PAGES_PER_TASK = 8
+MIN_PAGES_FOR_POOL = 24
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = int(os.getenv("PDF_TEXT_WORKERS", str(os.cpu_count() or 2)))
+            # spawn: forking a threaded web worker is unsafe
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _extract_range(path, start, stop):
+    """Worker: text of pages [start, stop)"""
+    import fitz
+
+    with fitz.open(path) as doc:
+        return [doc[i].get_text() for i in range(start, stop)]
+
+
+def pymupdf_version():
+    import fitz
+
+    return getattr(fitz, "VersionBind", None) or getattr(fitz, "__version__", "unknown")
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def iter_pages(path):
+    """Yield page texts in order, in parallel for large documents"""
+    import fitz
+
+    with fitz.open(path) as doc:
+        page_count = doc.page_count
+        if page_count < MIN_PAGES_FOR_POOL:
+            for page in doc:
+                yield page.get_text()
+            return
+
+    pool = _get_pool()
+    futures = [
+        pool.submit(_extract_range, path, start, min(start + PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, PAGES_PER_TASK)
+    ]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+class PdfTextCache:
+    """Extracted page texts stored as <cache_dir>/<sha256>-<pymupdf version>.json"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, digest):
+        version = str(pymupdf_version()).replace(os.sep, "_")
+        return os.path.join(self.cache_dir, f"{digest}-{version}.json")
+
+    def iter_pages(self, path, digest=None):
+        """Yield page texts, from the cache when possible, filling it otherwise"""
+        digest = digest or file_sha256(path)
+        cache_path = self._path(digest)
+        try:
+            with open(cache_path) as f:
+                pages = json.load(f)
+        except (FileNotFoundError, ValueError):
+            pages = None
+        if pages is not None:
+            yield from pages
+            return
+
+        pages = []
+        for text in iter_pages(path):
+            pages.append(text)
+            yield text
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(pages, f)
+        os.replace(tmp_path, cache_path)
+
+    def extract_text(self, path, digest=None):
+        return "\n\n".join(self.iter_pages(path, digest))
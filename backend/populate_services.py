@@ -1,19 +1,102 @@
 #!/usr/bin/env python3
 """
-Script to populate Firestore with the three required license categories:
-1. Application Service Provider
-2. Network Infrastructure 
-3. Network Service Provider
+Script to sync the Firestore services collection with the license catalog
+defined in catalog/services.json (see service_catalog.py).
+
+Each service is stored under an ID derived from its name, so re-running the
+script is idempotent. Existing documents are read in a single stream of the
+collection, diffed locally, and creates, updates and deletes are written in
+batches of up to 500.
+
+The first sync against a collection seeded under auto IDs deletes those
+documents and recreates them under slug IDs, so each license's `id` changes.
+Anything that stored the old ID (saved selections, applications) keeps it.
+The diff lists these moves and --dry-run shows them before anything is written.
+
+Usage:
+    python populate_services.py --dry-run    # print the diff only
+    python populate_services.py              # apply it
+    python populate_services.py --no-delete  # keep documents not in the catalog
 """
 
+import argparse
 import os
-from firebase_admin import credentials, firestore, initialize_app
+from collections import Counter
 from dotenv import load_dotenv
 
+from service_catalog import get_catalog
+
 # Load environment variables
 load_dotenv()
 
+# Firestore rejects batches with more than 500 writes
+MAX_BATCH_WRITES = 500
+
+
+def plan_sync(desired, existing, delete=True):
+    """Diff catalog against Firestore: (creates, updates, deletes) as lists of (doc_id, data)"""
+    creates = [(doc_id, data) for doc_id, data in desired.items() if doc_id not in existing]
+    updates = [(doc_id, data) for doc_id, data in desired.items()
+               if doc_id in existing and existing[doc_id] != data]
+    deletes = [(doc_id, data) for doc_id, data in existing.items() if doc_id not in desired] if delete else []
+    return creates, updates, deletes
+
+
+def read_existing(db, collection):
+    """Every document in the collection, read in one stream"""
+    return {snapshot.id: snapshot.to_dict() for snapshot in db.collection(collection).stream()}
+
+
+def find_moves(creates, deletes):
+    """Services deleted and recreated under a new ID, e.g. auto ID to slug: {old_id: new_id}"""
+    new_ids = {data.get("name"): doc_id for doc_id, data in creates}
+    return {doc_id: new_ids[data.get("name")] for doc_id, data in deletes if data.get("name") in new_ids}
+
+
+def apply_sync(db, collection, creates, updates, deletes):
+    """Write the plan in batches of at most MAX_BATCH_WRITES; returns the number of commits"""
+    writes = [("set", doc_id, data) for doc_id, data in creates + updates]
+    writes += [("delete", doc_id, None) for doc_id, _ in deletes]
+    commits = 0
+    for start in range(0, len(writes), MAX_BATCH_WRITES):
+        batch = db.batch()
+        for op, doc_id, data in writes[start:start + MAX_BATCH_WRITES]:
+            ref = db.collection(collection).document(doc_id)
+            if op == "set":
+                batch.set(ref, data)
+            else:
+                batch.delete(ref)
+        batch.commit()
+        commits += 1
+    return commits
+
+
+def print_diff(creates, updates, deletes, existing):
+    moves = find_moves(creates, deletes)
+    for doc_id, data in creates:
+        print(f"  + {doc_id} ({data['category']})")
+    for doc_id, data in updates:
+        before = existing[doc_id]
+        changed = sorted(key for key in set(data) | set(before) if data.get(key) != before.get(key))
+        print(f"  ~ {doc_id}: {', '.join(changed)}")
+    for doc_id, data in deletes:
+        moved = f" -> {moves[doc_id]}" if doc_id in moves else ""
+        print(f"  - {doc_id} ({data.get('name', 'unnamed')}){moved}")
+    print(f"{len(creates)} to create, {len(updates)} to update, {len(deletes)} to delete")
+    if moves:
+        print(f"⚠️  {len(moves)} service(s) move to a new ID (auto ID -> slug); clients and applications "
+              "holding the old license id will no longer find it")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Sync the Firestore services collection with the catalog")
+    parser.add_argument("--dry-run", action="store_true", help="print the diff without writing")
+    parser.add_argument("--no-delete", action="store_true", help="keep documents that are not in the catalog")
+    parser.add_argument("--collection", default="services")
+    args = parser.parse_args()
+
+    desired = get_catalog().documents
+
     # Initialize Firebase Admin SDK
     GOOGLE_CREDENTIALS = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
     if not GOOGLE_CREDENTIALS or not os.path.isfile(GOOGLE_CREDENTIALS):
@@ -21,6 +104,8 @@ def main():
         return
     
     try:
+        from firebase_admin import credentials, firestore, initialize_app
+
         cred = credentials.Certificate(GOOGLE_CREDENTIALS)
         initialize_app(cred)
         db = firestore.client()
@@ -29,187 +114,27 @@ def main():
         print(f"❌ Failed to initialize Firebase: {e}")
         return
 
-    # Define the three required categories with sample services
-    services_data = [
-        # Application Service Provider category
-        {
-            "name": "VoIP Service License",
-            "category": "Application Service Provider",
-            "first_time_application_fee": 500,
-            "first_time_license_fee": 2000,
-            "renewal_application_fee": 300,
-            "renewal_license_fee": 1500,
-            "validity": 3,
-            "processing_time": 45,
-            "application_requirements": [
-                "Business Plan",
-                "Technical Architecture Document",
-                "Financial Statements",
-                "Company Registration Certificate"
-            ],
-            "renewal_requirements": [
-                "Updated Business Plan",
-                "Financial Statements",
-                "Compliance Report"
-            ]
-        },
-        {
-            "name": "Video Conferencing Service License",
-            "category": "Application Service Provider", 
-            "first_time_application_fee": 400,
-            "first_time_license_fee": 1800,
-            "renewal_application_fee": 250,
-            "renewal_license_fee": 1300,
-            "validity": 3,
-            "processing_time": 40,
-            "application_requirements": [
-                "Business Plan",
-                "Technical Specifications",
-                "Security Plan",
-                "Company Registration Certificate"
-            ],
-            "renewal_requirements": [
-                "Updated Business Plan",
-                "Security Audit Report",
-                "Financial Statements"
-            ]
-        },
-        
-        # Network Infrastructure category
-        {
-            "name": "Data Center License Tier 1",
-            "category": "Network Infrastructure",
-            "first_time_application_fee": 1000,
-            "first_time_license_fee": 5000,
-            "renewal_application_fee": 600,
-            "renewal_license_fee": 3500,
-            "validity": 5,
-            "processing_time": 60,
-            "application_requirements": [
-                "Business Plan",
-                "Infrastructure Design Plans",
-                "Environmental Impact Assessment",
-                "Financial Capacity Certificate",
-                "Site Ownership/Lease Documents"
-            ],
-            "renewal_requirements": [
-                "Infrastructure Maintenance Records",
-                "Financial Statements",
-                "Compliance Report",
-                "Updated Environmental Assessment"
-            ]
-        },
-        {
-            "name": "Data Center License Tier 2",
-            "category": "Network Infrastructure",
-            "first_time_application_fee": 1500,
-            "first_time_license_fee": 8000,
-            "renewal_application_fee": 800,
-            "renewal_license_fee": 5500,
-            "validity": 5,
-            "processing_time": 75,
-            "application_requirements": [
-                "Business Plan",
-                "Advanced Infrastructure Design Plans",
-                "Redundancy Systems Documentation",
-                "Environmental Impact Assessment",
-                "Financial Capacity Certificate",
-                "Site Ownership/Lease Documents"
-            ],
-            "renewal_requirements": [
-                "Infrastructure Maintenance Records",
-                "Financial Statements",
-                "Compliance Report",
-                "Updated Environmental Assessment",
-                "Redundancy Testing Reports"
-            ]
-        },
-        
-        # Network Service Provider category
-        {
-            "name": "Internet Service Provider License",
-            "category": "Network Service Provider",
-            "first_time_application_fee": 800,
-            "first_time_license_fee": 4000,
-            "renewal_application_fee": 500,
-            "renewal_license_fee": 2800,
-            "validity": 4,
-            "processing_time": 55,
-            "application_requirements": [
-                "Business Plan",
-                "Network Topology Diagram",
-                "Peering Agreements",
-                "Financial Statements",
-                "Technical Team Qualifications"
-            ],
-            "renewal_requirements": [
-                "Network Performance Reports",
-                "Updated Business Plan",
-                "Financial Statements",
-                "Customer Satisfaction Reports"
-            ]
-        },
-        {
-            "name": "International Gateway License",
-            "category": "Network Service Provider",
-            "first_time_application_fee": 2000,
-            "first_time_license_fee": 10000,
-            "renewal_application_fee": 1200,
-            "renewal_license_fee": 7000,
-            "validity": 5,
-            "processing_time": 90,
-            "application_requirements": [
-                "Business Plan",
-                "International Connectivity Plans",
-                "Security Framework",
-                "Financial Capacity Certificate",
-                "Landing Rights Documentation",
-                "Regulatory Compliance Plan"
-            ],
-            "renewal_requirements": [
-                "Traffic Statistics Reports",
-                "Updated Business Plan",
-                "Financial Statements",
-                "Security Audit Report",
-                "Compliance Report"
-            ]
-        }
-    ]
-
-    # Add services to Firestore
-    print(f"Adding {len(services_data)} services to Firestore...")
-    
-    for service in services_data:
-        try:
-            # Check if service already exists by name
-            existing = db.collection('services').where('name', '==', service['name']).limit(1).get()
-            if len(existing) > 0:
-                print(f"⚠️  Service '{service['name']}' already exists, skipping...")
-                continue
-            
-            # Add new service
-            doc_ref = db.collection('services').document()
-            doc_ref.set(service)
-            print(f"✅ Added: {service['name']} ({service['category']})")
-            
-        except Exception as e:
-            print(f"❌ Failed to add {service['name']}: {e}")
-
-    print("\n🎉 Service population completed!")
-    
-    # Verify categories
-    print("\nVerifying categories in database:")
-    docs = db.collection('services').stream()
-    categories = set()
-    total_services = 0
-    
-    for doc in docs:
-        data = doc.to_dict()
-        categories.add(data.get('category', 'Unknown'))
-        total_services += 1
-    
-    print(f"Total services: {total_services}")
-    print(f"Categories found: {sorted(list(categories))}")
+    existing = read_existing(db, args.collection)
+    creates, updates, deletes = plan_sync(desired, existing, delete=not args.no_delete)
+
+    print(f"Catalog: {len(desired)} services; Firestore: {len(existing)} documents")
+    print_diff(creates, updates, deletes, existing)
+    if args.dry_run:
+        print("\nDry run, nothing written.")
+        return
+    if not (creates or updates or deletes):
+        print("\n✅ Already in sync")
+        return
+
+    commits = apply_sync(db, args.collection, creates, updates, deletes)
+    print(f"\n🎉 Sync completed in {commits} batch commit(s)!")
+
+    # Categories as stored now, computed from the catalog instead of re-reading the collection
+    categories = Counter(service["category"] for service in desired.values())
+    if args.no_delete:
+        categories.update(data.get("category", "Unknown") for doc_id, data in existing.items() if doc_id not in desired)
+    print(f"Total services: {sum(categories.values())}")
+    print(f"Categories found: {sorted(categories)}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,180 @@
+"""
+TF-IDF index of license requirements for a fast first-pass document match.
+
+The index is built from every requirement name in the services catalog plus a
+few typical phrases for common documents. Scoring a document is one pass over
+its tokens and a sparse dot product per requirement, so it takes milliseconds.
+Only the ambiguous document/requirement pairs go to the flan-t5 judge.
+"""
+
+import logging
+import math
+import re
+from collections import Counter
+
+from document_verification import tokenize, verdict_for, SATISFIED_SCORE, UNCERTAIN_SCORE
+
+logger = logging.getLogger(__name__)
+
+# Phrases that typically appear in a document answering a requirement,
+# keyed by a word that occurs in the requirement name
+TYPICAL_TERMS = {
+    "business": "executive summary market analysis business model revenue projections target market strategy",
+    "financial": "balance sheet income statement cash flow profit loss assets liabilities audited revenue",
+    "statements": "balance sheet income statement cash flow audited",
+    "registration": "certificate of incorporation registration number registrar company code rdb",
+    "certificate": "certificate issued certify valid",
+    "environmental": "environmental impact assessment emissions mitigation site ecology",
+    "technical": "architecture specifications equipment servers network design",
+    "infrastructure": "data center rack power cooling redundancy design",
+    "security": "security policy access control encryption firewall incident",
+    "network": "topology routers switches backbone fiber coverage",
+    "compliance": "compliance regulatory audit obligations",
+    "insurance": "insurance policy coverage insurer premium",
+    "qualifications": "curriculum vitae degree certification experience engineer",
+    "agreements": "agreement parties hereby terms signed",
+    "site": "lease ownership title deed land plot",
+    "plan": "plan objectives timeline milestones",
+}
+
+# Thresholds for the TF-IDF cosine between a document and a requirement
+TEXT_SATISFIED = 0.30
+TEXT_UNCERTAIN = 0.12
+
+
+def ngrams(tokens):
+    """Unigrams and bigrams"""
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+class RequirementIndex:
+    def __init__(self, requirements):
+        self.requirements = list(dict.fromkeys(requirements))
+        profiles = {req: ngrams(self._profile_tokens(req)) for req in self.requirements}
+
+        document_frequency = Counter()
+        for terms in profiles.values():
+            document_frequency.update(set(terms))
+        total = max(len(profiles), 1)
+        self.idf = {term: math.log((1 + total) / (1 + df)) + 1 for term, df in document_frequency.items()}
+        self.vectors = {req: self._vector(Counter(terms)) for req, terms in profiles.items()}
+
+    @classmethod
+    def from_catalog(cls, catalog):
+        requirements = []
+        for category in catalog:
+            for lic in category.get("licenses", []):
+                requirements.extend(lic.get("application_requirements", []))
+                requirements.extend(lic.get("renewal_requirements", []))
+        return cls(requirements)
+
+    @staticmethod
+    def _profile_tokens(requirement):
+        tokens = tokenize(requirement)
+        extra = []
+        for token in tokens:
+            if token in TYPICAL_TERMS:
+                extra.extend(tokenize(TYPICAL_TERMS[token]))
+        # The name itself is weighted twice as much as the typical phrases
+        return tokens + tokens + extra
+
+    def _vector(self, counts):
+        vector = {
+            term: (1 + math.log(count)) * self.idf[term]
+            for term, count in counts.items() if term in self.idf
+        }
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {term: v / norm for term, v in vector.items()}
+
+    def document_vector(self, text):
+        """TF-IDF vector of a document restricted to the index vocabulary"""
+        return self._vector(Counter(ngrams(tokenize(text))))
+
+    def similarity(self, requirement, doc_vector):
+        vector = self.vectors.get(requirement)
+        if vector is None:
+            vector = self._vector(Counter(ngrams(self._profile_tokens(requirement))))
+        if len(vector) > len(doc_vector):
+            vector, doc_vector = doc_vector, vector
+        return sum(weight * doc_vector.get(term, 0.0) for term, weight in vector.items())
+
+
+class IndexedClassifier:
+    """
+    Match documents to requirements with the TF-IDF index.
+
+    The upload label (form field and filename) is checked as before. Document
+    text is scored by cosine similarity. Pairs that stay in the uncertain band
+    are sent in one batch to the optional judge, e.g. FlanT5Judge.
+    """
+
+    def __init__(self, get_index, judge=None):
+        self.get_index = get_index
+        self.judge = judge
+
+    def classify(self, requirements, documents):
+        index = self.get_index()
+        for document in documents:
+            if "vector" not in document:
+                document["vector"] = index.document_vector(document.get("text", ""))
+
+        verdicts = []
+        ambiguous = []
+        for requirement in requirements:
+            wanted = set(tokenize(requirement))
+            best, best_score = None, 0.0
+            for document in documents:
+                label = set(tokenize(f"{document['type']} {document['filename']}"))
+                label_score = len(wanted & label) / len(wanted) if wanted else 0.0
+                text_score = index.similarity(requirement, document["vector"])
+                # Map the text cosine onto the label scale so both share the verdict thresholds
+                if text_score >= TEXT_SATISFIED:
+                    text_scaled = SATISFIED_SCORE + (1 - SATISFIED_SCORE) * min(text_score, 1.0)
+                elif text_score >= TEXT_UNCERTAIN:
+                    text_scaled = UNCERTAIN_SCORE
+                else:
+                    text_scaled = UNCERTAIN_SCORE * text_score / TEXT_UNCERTAIN
+                score = max(label_score, text_scaled)
+                if score > best_score:
+                    best, best_score = document, score
+
+            verdict = {
+                "requirement": requirement,
+                "verdict": verdict_for(best_score),
+                "score": round(best_score, 3),
+                "file": best["filename"] if best and best_score >= UNCERTAIN_SCORE else None,
+                "sha256": best.get("sha256") if best and best_score >= UNCERTAIN_SCORE else None,
+                "method": "index",
+            }
+            verdicts.append(verdict)
+            if verdict["verdict"] == "uncertain" and best.get("text"):
+                ambiguous.append((verdict, best))
+
+        if self.judge is not None and ambiguous:
+            try:
+                answers = self.judge.judge([(v["requirement"], doc["text"]) for v, doc in ambiguous])
+            except Exception as e:
+                # Model unavailable: keep the index verdicts ("uncertain") for a reviewer
+                logger.warning("Requirement judge failed, keeping index verdicts: %s", e)
+                return verdicts
+            for (verdict, _), matches in zip(ambiguous, answers):
+                verdict["verdict"] = "satisfied" if matches else "missing"
+                verdict["method"] = "model"
+                if not matches:
+                    verdict["file"] = verdict["sha256"] = None
+        return verdicts
+
+
+class FlanT5Judge:
+    """Ask flan-t5 whether a document is a given requirement, batched"""
+
+    def __init__(self, extractor):
+        self.extractor = extractor
+
+    def judge(self, pairs):
+        self.extractor.load()
+        prompts = [
+            f"Is the following document a {requirement}?\n\n{self.extractor.chunk_text(text)[0]}\n\nAnswer yes or no."
+            for requirement, text in pairs
+        ]
+        return [bool(re.match(r"\s*yes", answer, re.I)) for answer in self.extractor.generate(prompts)]
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+The license catalog, defined once in catalog/services.json.
+
+`python service_catalog.py build` validates the source and writes a compact
+snapshot (catalog/services.snapshot.json). The snapshot holds the Firestore
+documents keyed by deterministic ID and the grouped /services payload. The
+API, app_clean.py and populate_services.py all load the snapshot once per
+process. If the snapshot is missing or was built from a different source, the
+source is compiled in memory instead.
+
+Usage:
+    python service_catalog.py build    # validate and write the snapshot
+    python service_catalog.py check    # validate; exit 1 if the snapshot is stale
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+
+from catalog_cache import normalize_service, group_by_category
+
+logger = logging.getLogger(__name__)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SOURCE_PATH = os.path.join(HERE, "catalog", "services.json")
+SNAPSHOT_PATH = os.path.join(HERE, "catalog", "services.snapshot.json")
+SNAPSHOT_FORMAT = 1
+
+# Field -> accepted types; every service must have all of them
+SERVICE_FIELDS = {
+    "name": (str,),
+    "first_time_application_fee": (int, float),
+    "first_time_license_fee": (int, float),
+    "renewal_application_fee": (int, float),
+    "renewal_license_fee": (int, float),
+    "validity": (int,),
+    "processing_time": (int,),
+    "application_requirements": (list,),
+    "renewal_requirements": (list,),
+}
+
+
+class CatalogError(ValueError):
+    """The catalog source does not match the schema; .errors lists every problem"""
+
+    def __init__(self, errors):
+        super().__init__("Invalid catalog:\n  " + "\n  ".join(errors))
+        self.errors = errors
+
+
+def service_id(name):
+    """Deterministic document ID from the name, e.g. VoIP Service License -> voip-service-license"""
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def validate(source):
+    """Return a list of schema errors (empty when the source is valid)"""
+    errors = []
+    categories = source.get("categories") if isinstance(source, dict) else None
+    if not isinstance(categories, list) or not categories:
+        return ["top level must be {\"categories\": [...]} with at least one category"]
+
+    seen_ids = {}
+    for i, category in enumerate(categories):
+        where = f"categories[{i}]"
+        if not isinstance(category, dict) or not isinstance(category.get("name"), str) or not category["name"].strip():
+            errors.append(f"{where}: needs a non-empty name")
+            continue
+        where = f"category '{category['name']}'"
+        if not isinstance(category.get("services"), list) or not category["services"]:
+            errors.append(f"{where}: needs a non-empty services list")
+            continue
+        for j, service in enumerate(category["services"]):
+            label = f"{where} service {service.get('name', j) if isinstance(service, dict) else j}"
+            if not isinstance(service, dict):
+                errors.append(f"{label}: must be an object")
+                continue
+            for field, types in SERVICE_FIELDS.items():
+                value = service.get(field)
+                if field not in service:
+                    errors.append(f"{label}: missing {field}")
+                elif not isinstance(value, types) or isinstance(value, bool):
+                    errors.append(f"{label}: {field} must be {' or '.join(t.__name__ for t in types)}")
+                elif isinstance(value, (int, float)) and value < 0:
+                    errors.append(f"{label}: {field} must not be negative")
+                elif isinstance(value, list) and not all(isinstance(r, str) and r.strip() for r in value):
+                    errors.append(f"{label}: {field} must be a list of non-empty strings")
+            for field in sorted(set(service) - set(SERVICE_FIELDS)):
+                errors.append(f"{label}: unknown field {field}")
+            if isinstance(service.get("name"), str):
+                doc_id = service_id(service["name"])
+                if not doc_id:
+                    errors.append(f"{label}: name has no letters or digits")
+                elif doc_id in seen_ids:
+                    errors.append(f"{label}: ID {doc_id} clashes with '{seen_ids[doc_id]}'")
+                seen_ids[doc_id] = service["name"]
+    return errors
+
+
+def compile_catalog(source, source_hash):
+    """Validated source -> snapshot dict"""
+    errors = validate(source)
+    if errors:
+        raise CatalogError(errors)
+    documents = {}
+    for category in source["categories"]:
+        for service in category["services"]:
+            documents[service_id(service["name"])] = {**service, "category": category["name"]}
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "source_hash": source_hash,
+        "documents": documents,
+        "categories": group_by_category(normalize_service(doc_id, doc) for doc_id, doc in documents.items()),
+    }
+
+
+def _read_source(source_path):
+    with open(source_path, "rb") as f:
+        raw = f.read()
+    return json.loads(raw), hashlib.sha256(raw).hexdigest()
+
+
+def build(source_path=SOURCE_PATH, snapshot_path=SNAPSHOT_PATH):
+    source, source_hash = _read_source(source_path)
+    snapshot = compile_catalog(source, source_hash)
+    tmp_path = snapshot_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot, f, separators=(",", ":"), ensure_ascii=False)
+    os.replace(tmp_path, snapshot_path)
+    return snapshot
+
+
+class Catalog:
+    """Loaded snapshot: documents by ID, the grouped categories and a prepared /services body"""
+
+    def __init__(self, snapshot):
+        self.documents = snapshot["documents"]
+        self.categories = snapshot["categories"]
+        self.version = snapshot["source_hash"][:12]
+        self._payload = None
+
+    @property
+    def payload(self):
+        if self._payload is None:
+            from http_cache import PreparedJSON, serialize
+
+            self._payload = PreparedJSON(serialize(self.categories))
+        return self._payload
+
+
+def load_catalog(source_path=SOURCE_PATH, snapshot_path=SNAPSHOT_PATH):
+    """Catalog from the snapshot, or compiled from the source when the snapshot is stale"""
+    source, source_hash = _read_source(source_path)
+    try:
+        with open(snapshot_path) as f:
+            snapshot = json.load(f)
+        if snapshot.get("format") == SNAPSHOT_FORMAT and snapshot.get("source_hash") == source_hash:
+            return Catalog(snapshot)
+        logger.warning("Catalog snapshot is stale; run `python service_catalog.py build`")
+    except FileNotFoundError:
+        logger.info("No catalog snapshot; compiling %s", source_path)
+    return Catalog(compile_catalog(source, source_hash))
+
+
+_lock = threading.Lock()
+_catalog = None
+
+
+def get_catalog():
+    """Process-wide catalog, loaded on first use"""
+    global _catalog
+    if _catalog is None:
+        with _lock:
+            if _catalog is None:
+                _catalog = load_catalog()
+    return _catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate and compile the license catalog")
+    parser.add_argument("command", choices=["build", "check"])
+    parser.add_argument("--source", default=SOURCE_PATH)
+    parser.add_argument("--snapshot", default=SNAPSHOT_PATH)
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            snapshot = build(args.source, args.snapshot)
+            print(f"✅ {len(snapshot['documents'])} services in {len(snapshot['categories'])} categories -> {args.snapshot}")
+            return
+        source, source_hash = _read_source(args.source)
+        compile_catalog(source, source_hash)
+    except CatalogError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    try:
+        with open(args.snapshot) as f:
+            fresh = json.load(f).get("source_hash") == source_hash
+    except FileNotFoundError:
+        fresh = False
+    if not fresh:
+        print("❌ Snapshot missing or out of date; run `python service_catalog.py build`")
+        sys.exit(1)
+    print("✅ Catalog valid and snapshot up to date")
+
+
+if __name__ == "__main__":
+    main()
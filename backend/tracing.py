@@ -0,0 +1,305 @@
+"""
+Lightweight request tracing compatible with OpenTelemetry.
+
+Spans use OpenTelemetry's data model: 128-bit trace IDs, 64-bit span IDs,
+kinds, attributes and status. Incoming W3C `traceparent` headers are
+continued. Finished spans are exported as OTLP/JSON, so any OpenTelemetry
+collector can ingest them without the SDK installed.
+
+Environment:
+    TRACE_EXPORTER      none (default), memory, file or otlp
+    TRACE_FILE          JSON-lines output for the file exporter (default traces.jsonl)
+    TRACE_SAMPLE_RATE   fraction of new traces recorded (default 1.0); an
+                        incoming traceparent's sampled flag is always honoured
+    OTEL_EXPORTER_OTLP_ENDPOINT   collector base URL for otlp (default http://localhost:4318)
+    OTEL_SERVICE_NAME   resource service.name (default licenseease-backend)
+"""
+
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+KINDS = {"internal": 1, "server": 2, "client": 3, "producer": 4, "consumer": 5}
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation; only sampled spans are recorded and exported"""
+
+    def __init__(self, tracer, name, trace_id, parent_id, kind, sampled, attributes=None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.sampled = sampled
+        self.attributes = dict(attributes or {}) if sampled else {}
+        self.events = []
+        self.status = None  # None (unset), "ok" or ("error", message)
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def set_attribute(self, key, value):
+        if self.sampled:
+            self.attributes[key] = value
+
+    def record_exception(self, exc):
+        if self.sampled:
+            self.events.append({
+                "name": "exception",
+                "time_ns": time.time_ns(),
+                "attributes": {"exception.type": type(exc).__name__, "exception.message": str(exc)},
+            })
+            self.status = ("error", str(exc))
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            if self.sampled:
+                self.tracer.processor.on_end(self)
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+# ─── Exporters ─────────────────────────────────────────────────────────────
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes):
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+def to_otlp(spans, service_name):
+    """OTLP/JSON ExportTraceServiceRequest for a batch of finished spans"""
+    otlp_spans = []
+    for span in spans:
+        item = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": KINDS[span.kind],
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": _otlp_attributes(span.attributes),
+        }
+        if span.parent_id:
+            item["parentSpanId"] = span.parent_id
+        if span.events:
+            item["events"] = [
+                {"name": e["name"], "timeUnixNano": str(e["time_ns"]), "attributes": _otlp_attributes(e["attributes"])}
+                for e in span.events
+            ]
+        if span.status == "ok":
+            item["status"] = {"code": 1}
+        elif span.status:
+            item["status"] = {"code": 2, "message": span.status[1]}
+        otlp_spans.append(item)
+    return {"resourceSpans": [{
+        "resource": {"attributes": _otlp_attributes({"service.name": service_name})},
+        "scopeSpans": [{"scope": {"name": "licenseease.tracing"}, "spans": otlp_spans}],
+    }]}
+
+
+class InMemoryExporter:
+    """Keeps finished spans in a list; for tests and local debugging"""
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        with self._lock:
+            self.spans.extend(spans)
+
+    def clear(self):
+        with self._lock:
+            self.spans = []
+
+
+class FileExporter:
+    """Appends one OTLP/JSON request per batch as a line of a file"""
+
+    def __init__(self, path, service_name):
+        self.path = path
+        self.service_name = service_name
+
+    def export(self, spans):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(to_otlp(spans, self.service_name)) + "\n")
+
+
+class OTLPHTTPExporter:
+    """POSTs OTLP/JSON batches to a collector's /v1/traces"""
+
+    def __init__(self, endpoint, service_name, timeout=5):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def export(self, spans):
+        import urllib.request
+
+        body = json.dumps(to_otlp(spans, self.service_name)).encode()
+        req = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            response.read()
+
+
+# ─── Span processors ───────────────────────────────────────────────────────
+
+class SimpleProcessor:
+    """Exports each span as it ends"""
+
+    def __init__(self, exporter):
+        self.exporter = exporter
+
+    def on_end(self, span):
+        self.exporter.export([span])
+
+
+class BatchProcessor:
+    """Queues finished spans and exports them in batches from a background thread"""
+
+    def __init__(self, exporter, max_batch=512, interval=5.0, max_queue=4096):
+        self.exporter = exporter
+        self.max_batch = max_batch
+        self.interval = interval
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self):
+        # Started lazily (and again after fork) so importing this module starts no threads
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    threading.Thread(target=self._run, daemon=True).start()
+                    self._pid = os.getpid()
+
+    def on_end(self, span):
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = []
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self.exporter.export(batch)
+                except Exception as e:
+                    logger.warning("Trace export of %d spans failed: %s", len(batch), e)
+
+
+class NoopProcessor:
+    def on_end(self, span):
+        pass
+
+
+# ─── Tracer ────────────────────────────────────────────────────────────────
+
+class Tracer:
+    def __init__(self, processor, sample_rate=1.0):
+        self.processor = processor
+        self.sample_rate = sample_rate
+        self.enabled = not isinstance(processor, NoopProcessor)
+        # Returned for every span while tracing is off, so disabled tracing costs one branch
+        self._noop = Span(self, "", "0" * 32, None, "internal", False)
+
+    def _should_sample(self, trace_id):
+        # Ratio on the trace ID, so every process makes the same call for a trace
+        return int(trace_id[16:], 16) < self.sample_rate * 2 ** 64
+
+    def start_span(self, name, kind="internal", attributes=None, traceparent=None):
+        """Start a span under the current one, or under an incoming traceparent header"""
+        if not self.enabled:
+            return self._noop
+        parent = _current_span.get()
+        match = TRACEPARENT_RE.match(traceparent or "") if parent is None else None
+        if parent is not None:
+            trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+        elif match:
+            trace_id, parent_id, sampled = match.group(1), match.group(2), match.group(3) == "01"
+        else:
+            trace_id = secrets.token_hex(16)
+            parent_id, sampled = None, self._should_sample(trace_id)
+        return Span(self, name, trace_id, parent_id, kind, sampled and self.enabled, attributes)
+
+
+def create_tracer():
+    """Tracer configured from TRACE_EXPORTER and TRACE_SAMPLE_RATE"""
+    kind = os.getenv("TRACE_EXPORTER", "none")
+    service_name = os.getenv("OTEL_SERVICE_NAME", "licenseease-backend")
+    sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+    if kind == "memory":
+        return Tracer(SimpleProcessor(InMemoryExporter()), sample_rate)
+    if kind == "file":
+        return Tracer(BatchProcessor(FileExporter(os.getenv("TRACE_FILE", "traces.jsonl"), service_name), interval=1.0), sample_rate)
+    if kind == "otlp":
+        endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
+        return Tracer(BatchProcessor(OTLPHTTPExporter(endpoint, service_name)), sample_rate)
+    if kind != "none":
+        raise ValueError(f"Unknown TRACE_EXPORTER: {kind}")
+    return Tracer(NoopProcessor(), sample_rate)
+
+
+tracer = create_tracer()
+
+
+def activate(span):
+    """Make span the parent of spans started in this context; returns a token for deactivate()"""
+    return _current_span.set(span)
+
+
+def deactivate(token):
+    _current_span.reset(token)
+
+
+def current_span():
+    return _current_span.get()
+
+
+@contextlib.contextmanager
+def start_span(name, kind="internal", attributes=None):
+    """Run a block inside a child span of the current one; exceptions mark it as failed"""
+    span = tracer.start_span(name, kind, attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_exception(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
@@ -0,0 +1,130 @@
+"""
+User repository with O(1) lookups by email.
+
+Emails are normalized (trimmed, lower-cased) before indexing so
+"John@Example.com" and "john@example.com" are the same account.
+"""
+
+import re
+import threading
+
+
+class InvalidEmail(ValueError):
+    """The email cannot be stored under this store's key scheme"""
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def user_doc_id(email):
+    """
+    Firestore document ID for an email, or None if it cannot be one.
+
+    IDs may not contain '/', be '.' or '..', match __.*__ or exceed 1500 bytes;
+    such input would otherwise build an invalid path in the client library.
+    """
+    key = normalize_email(email)
+    if (not key or '/' in key or key in ('.', '..') or re.fullmatch(r'__.*__', key)
+            or len(key.encode('utf-8')) > 1500):
+        return None
+    return key
+
+
+class UserStore:
+    """Interface shared by the in-memory and Firestore-backed user stores"""
+
+    def get_by_email(self, email):
+        """Return the user dict for this email, or None"""
+        raise NotImplementedError
+
+    def add(self, user):
+        """Insert a new user; return False if the email is already taken"""
+        raise NotImplementedError
+
+    def update(self, email, fields):
+        """Merge fields into an existing user; return the updated user or None"""
+        raise NotImplementedError
+
+    def all(self):
+        """Iterate over every stored user"""
+        raise NotImplementedError
+
+    def exists(self, email):
+        return self.get_by_email(email) is not None
+
+
+class InMemoryUserStore(UserStore):
+    """Users held in a dict keyed by normalized email"""
+
+    def __init__(self, users=None):
+        self._lock = threading.Lock()
+        self._by_email = {}
+        for user in users or []:
+            self.add(user)
+
+    def get_by_email(self, email):
+        return self._by_email.get(normalize_email(email))
+
+    def add(self, user):
+        key = normalize_email(user.get('email'))
+        with self._lock:
+            if key in self._by_email:
+                return False
+            self._by_email[key] = user
+            return True
+
+    def update(self, email, fields):
+        with self._lock:
+            user = self._by_email.get(normalize_email(email))
+            if user is not None:
+                user.update(fields)
+            return user
+
+    def all(self):
+        return list(self._by_email.values())
+
+    def __len__(self):
+        return len(self._by_email)
+
+
+class FirestoreUserStore(UserStore):
+    """
+    Users stored one document per normalized email, so lookups are a single get.
+
+    Calls go through a FirestoreAccess, so they have deadlines and raise
+    FirestoreUnavailable when the users collection's circuit is open.
+    """
+
+    def __init__(self, access, collection='users'):
+        self.access = access
+        self.collection = collection
+
+    def get_by_email(self, email):
+        doc_id = user_doc_id(email)
+        if doc_id is None:
+            return None
+        return self.access.get(self.collection, doc_id)
+
+    def add(self, user):
+        from google.api_core.exceptions import AlreadyExists
+
+        doc_id = user_doc_id(user.get('email'))
+        if doc_id is None:
+            raise InvalidEmail(f"Invalid email: {user.get('email')!r}")
+        try:
+            # create() fails if the document exists, so the duplicate check is atomic
+            self.access.run(self.collection, "set",
+                            lambda db, timeout: db.collection(self.collection).document(doc_id).create(user, timeout=timeout))
+            return True
+        except AlreadyExists:
+            return False
+
+    def update(self, email, fields):
+        if self.get_by_email(email) is None:
+            return None
+        self.access.set(self.collection, user_doc_id(email), fields, merge=True)
+        return self.get_by_email(email)
+
+    def all(self):
+        return [user for _, user in self.access.stream(self.collection)]
@@ -0,0 +1,12 @@
+"""
+WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+Background threads are started per worker by the post_fork hook in
+gunicorn.conf.py, not here, so a preloaded master does not own them.
+"""
+
+from app import create_app
+
+application = create_app(start_workers=False)
@@ -14,24 +14,31 @@ interface Application {
   description: string
   status: string
   submitted_at: string
-  files?: any[]
+  files_count?: number
 }
 
+const PAGE_SIZE = 50
+const FIELDS = 'applicant_name,applicant_email,company,license_type,description,status,submitted_at,files_count'
+
 export default function ApplicationsDataTable() {
   const [applications, setApplications] = useState<Application[]>([])
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState('')
 
-  const fetchApplications = async () => {
+  const fetchApplications = async (cursor: string | null = null) => {
     try {
-      const response = await fetch('http://127.0.0.1:5002/applications')
+      const params = new URLSearchParams({ limit: String(PAGE_SIZE), order: 'desc', fields: FIELDS })
+      if (cursor) params.set('cursor', cursor)
+      const response = await fetch(`http://127.0.0.1:5002/applications?${params}`)
       
       if (!response.ok) {
         throw new Error('Failed to fetch applications')
       }
       
       const data = await response.json()
-      setApplications(data)
+      setApplications(prev => cursor ? [...prev, ...data.applications] : data.applications)
+      setNextCursor(data.next_cursor)
     } catch (err) {
       console.error('Error fetching applications:', err)
       setError('Failed to load applications')
@@ -60,7 +67,7 @@ export default function ApplicationsDataTable() {
       <div className="text-center py-8">
         <div className="text-red-500">{error}</div>
         <button 
-          onClick={fetchApplications}
+          onClick={() => fetchApplications()}
           className="mt-2 px-4 py-2 bg-blue-600 text-white rounded hover:bg-blue-700"
         >
           Retry
@@ -80,6 +87,7 @@ export default function ApplicationsDataTable() {
   }
 
   return (
+    <>
     <Table className='w-full min-w-[769px]'>
       <TableHeader>
         <TableRow>
@@ -139,7 +147,7 @@ export default function ApplicationsDataTable() {
             </TableCell>
             <TableCell>
               <div className='text-sm'>
-                {application.files?.length || 0} document(s)
+                {application.files_count ?? 0} document(s)
               </div>
             </TableCell>
             <TableCell>
@@ -159,5 +167,16 @@ export default function ApplicationsDataTable() {
         )}
       </TableBody>
     </Table>
+    {nextCursor && (
+      <div className="text-center py-4">
+        <button
+          onClick={() => fetchApplications(nextCursor)}
+          className="px-4 py-2 bg-blue-600 text-white rounded hover:bg-blue-700"
+        >
+          Load more
+        </button>
+      </div>
+    )}
+    </>
   )
 }